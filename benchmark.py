@@ -0,0 +1,410 @@
+"""
+Benchmark handler bot dengan data sintetis, tanpa koneksi ke Telegram.
+
+Contoh:
+    python benchmark.py --rows 1000,10000,100000 --iterations 50 --json hasil.json
+
+Setiap ukuran data dijalankan di subprocess baru (python benchmark.py --worker ...) dengan
+folder sementara sebagai working directory: file Excel & wallet JSON format lama (default
+jumlah wallet = jumlah baris, atur dengan --wallets) dibuat di sana
+(lalu dimigrasi seperti saat bot pertama kali jalan), kemudian setiap operasi dijalankan berulang
+kali lewat handler bot dengan objek Update/CallbackQuery/Bot palsu. Benchmark tidak menyentuh
+cache/state internal bot, sehingga tetap jalan walaupun implementasi storage berubah.
+Hasil: latensi p50/p95, puncak alokasi memori dan byte yang ditulis per operasi.
+Seed tetap, sehingga hasil antar revisi bisa dibandingkan.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+os.environ.setdefault("ADMIN_ID", "1")
+# Jangan sampai token di .env ikut terbaca: benchmark tidak pernah menghubungi Telegram
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:benchmark")
+
+import bot  # noqa: E402
+from openpyxl import Workbook  # noqa: E402
+
+AIRDROP_TYPES = ["TESTNET", "AIRDROP", "NODE", "OTHER"]
+DUE_REMINDERS = 50
+
+
+def generate_dataset(directory, rows, wallet_count, seed):
+    """Tulis file Excel (rows baris airdrop) dan wallet JSON (wallet_count wallet) milik ADMIN_ID ke directory."""
+    rng = random.Random(seed)
+    wallets = [{"address": "0x%040x" % rng.getrandbits(160), "chain": "EVM"} for _ in range(wallet_count)]
+    with open(os.path.join(directory, bot.WALLET_FILE), "w") as f:
+        json.dump({str(bot.ADMIN_ID): wallets}, f)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(bot.EXCEL_HEADER[1:])
+    start = datetime(2024, 1, 1)
+    for i in range(rows):
+        ws.append([
+            f"HTTPS://T.ME/CAMPAIGN_{i}_{rng.getrandbits(32):08x}",
+            f"CAMPAIGN {i} {rng.choice(['ALPHA', 'BETA', 'GAMMA', 'DELTA'])}",
+            rng.choice(AIRDROP_TYPES),
+            rng.choice(wallets)["address"],
+            (start + timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S"),
+        ])
+    wb.save(os.path.join(directory, bot.EXCEL_FILE))
+
+
+# Semua balasan bot selama satu operasi: (jenis, teks, reply_markup). Dipakai untuk memastikan
+# operasi benar-benar berhasil, bukan hanya cepat karena handler membalas pesan error.
+OUTBOX = []
+
+
+class FakeUser:
+    def __init__(self, user_id):
+        self.id = user_id
+
+
+class FakeMessage:
+    def __init__(self, user_id, text=None):
+        self.from_user = FakeUser(user_id)
+        self.chat_id = user_id
+        self.text = text
+        self.sent = 0
+        self.replies = []
+
+    async def reply_text(self, text, reply_markup=None, **kwargs):
+        self.sent += 1
+        self.replies.append((text, reply_markup))
+        OUTBOX.append(("text", text, reply_markup))
+        return self
+
+    async def reply_document(self, document=None, **kwargs):
+        self.sent += 1
+        OUTBOX.append(("document", None, None))
+        return self
+
+
+class FakeCallbackQuery:
+    def __init__(self, user_id, data):
+        self.from_user = FakeUser(user_id)
+        self.data = data
+        self.message = FakeMessage(user_id)
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+    async def edit_message_text(self, text, reply_markup=None, **kwargs):
+        self.message.sent += 1
+        self.message.replies.append((text, reply_markup))
+        OUTBOX.append(("text", text, reply_markup))
+
+
+class FakeUpdate:
+    def __init__(self, user_id, data=None, text=None):
+        self.effective_user = FakeUser(user_id)
+        self.callback_query = FakeCallbackQuery(user_id, data) if data is not None else None
+        self.message = FakeMessage(user_id, text) if data is None else None
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent += 1
+        OUTBOX.append(("text", text, kwargs.get("reply_markup")))
+
+
+class FakeJobQueue:
+    def run_once(self, callback, when, **kwargs):
+        pass
+
+
+class FakeContext:
+    def __init__(self, user_data=None, args=None):
+        self.user_data = user_data if user_data is not None else {}
+        self.bot = FakeBot()
+        self.job_queue = FakeJobQueue()
+        self.application = None
+        self.args = args or []
+
+
+def reply_callbacks(update, pattern):
+    """callback_data tombol pada balasan handler yang cocok dengan regex pattern."""
+    message = update.callback_query.message if update.callback_query else update.message
+    return [
+        button.callback_data
+        for _, markup in message.replies if markup is not None
+        for row in markup.inline_keyboard for button in row
+        if button.callback_data and re.match(pattern, button.callback_data)
+    ]
+
+
+def bytes_written():
+    """Total byte yang ditulis proses ini (Linux), None jika tidak tersedia."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Operations:
+    """
+    Setiap operasi: setup() (tidak diukur) lalu run() (diukur). Semua data diambil dan diubah
+    lewat handler bot, ID airdrop/wallet dibaca dari keyboard balasan handler.
+    """
+
+    def __init__(self, rows, seed):
+        self.user_id = bot.ADMIN_ID
+        self.rng = random.Random(seed)
+        self.counter = 0
+
+    async def prepare(self):
+        update = FakeUpdate(self.user_id, "airdrop_type_node")
+        await bot.choose_wallet(update, FakeContext())
+        self.wallets = reply_callbacks(update, r"^wallet_\d+$")
+        # Airdrop untuk reminder: kumpulkan dari halaman keyboard pilihan reminder
+        context = FakeContext({"rem_sett_mode": "auto"})
+        update = FakeUpdate(self.user_id, "rem_sett_mode_auto")
+        await bot.reminder_sett_choose(update, context)
+        page = 0
+        while len(reply_callbacks(update, r"^rem_sett_choice_\d+$")) < DUE_REMINDERS:
+            page += 1
+            before = update.callback_query.message.sent
+            update.callback_query.data = bot.picker_data("rs", page)
+            await bot.picker_page(update, context)
+            if update.callback_query.message.sent == before or not reply_callbacks(update, rf"^pg:rs:{page + 1}:"):
+                break
+        self.reminder_choices = reply_callbacks(update, r"^rem_sett_choice_\d+$")[:DUE_REMINDERS]
+
+    async def _save(self, title):
+        self.counter += 1
+        context = FakeContext({
+            "airdrop_link": f"HTTPS://T.ME/BENCH_{self.counter}",
+            "airdrop_title": title,
+            "airdrop_type": "NODE",
+        })
+        return bot.save_airdrop(FakeUpdate(self.user_id, self.rng.choice(self.wallets)), context)
+
+    # save_airdrop: simpan satu airdrop baru (link unik agar tidak ditolak sebagai duplikat)
+    async def save_airdrop(self):
+        return await self._save(f"BENCH {self.counter + 1}")
+
+    async def list_airdrop(self):
+        return bot.list_airdrop(FakeUpdate(self.user_id, "list_airdrop"), FakeContext())
+
+    # delete_airdrop: simpan airdrop dengan judul unik, cari ID-nya lewat /search,
+    # lalu ukur keyboard pilihan + hapus (ukuran data tetap stabil)
+    async def delete_airdrop(self):
+        title = f"BENCHDEL{self.counter + 1}"
+        await (await self._save(title))
+        update = FakeUpdate(self.user_id, text=f"/search {title}")
+        await bot.search_command(update, FakeContext(args=[title]))
+        target = int(re.search(r"#(\d+)", update.message.replies[-1][0]).group(1))
+
+        async def run():
+            await bot.delete_airdrop(FakeUpdate(self.user_id, "delete_airdrop"), FakeContext())
+            await bot.process_delete_airdrop(FakeUpdate(self.user_id, f"delairdrop_{target}"), FakeContext())
+        return run()
+
+    async def reminder_sett_choose(self):
+        return bot.reminder_sett_choose(FakeUpdate(self.user_id, "rem_sett_mode_auto"), FakeContext({"rem_sett_mode": "auto"}))
+
+    # reminder_airdrop_job: DUE_REMINDERS reminder dijadwalkan lewat handler (jatuh tempo saat itu juga)
+    async def reminder_airdrop_job(self):
+        for data in self.reminder_choices:
+            context = FakeContext({"rem_interval": bot.AUTO_REMINDER_INTERVAL})
+            await bot.reminder_sett_schedule(FakeUpdate(self.user_id, data), context)
+        return bot.reminder_airdrop_job(FakeContext())
+
+    # download_data: export xlsx tanpa cache (airdrop baru disimpan dulu agar versi data berubah)
+    async def download_data(self):
+        await (await self._save(f"BENCH {self.counter + 1}"))
+        return bot.download_export(FakeUpdate(self.user_id, "dl_xlsx"), FakeContext())
+
+
+def _has_text(prefix):
+    return lambda outbox: any(kind == "text" and text.startswith(prefix) for kind, text, _ in outbox)
+
+
+def _has_button(pattern):
+    return lambda outbox: any(
+        re.match(pattern, button.callback_data or "")
+        for _, _, markup in outbox if markup is not None
+        for row in markup.inline_keyboard for button in row
+    )
+
+
+# Balasan yang harus ada agar satu putaran operasi dianggap berhasil
+EXPECTED_REPLY = {
+    "save_airdrop": _has_text("✅ AIRDROP BERHASIL DISIMPAN"),
+    "list_airdrop": _has_text("📊"),
+    "delete_airdrop": _has_text("✅ Airdrop BERHASIL DIHAPUS"),
+    "reminder_sett_choose": _has_button(r"^rem_sett_choice_\d+$"),
+    "reminder_airdrop_job": _has_text("📢"),
+    "download_data": lambda outbox: any(kind == "document" for kind, _, _ in outbox),
+}
+
+
+def check_replies(name):
+    """Return alasan gagal (str) jika balasan operasi berisi error atau tidak sesuai harapan, None jika OK."""
+    for kind, text, _ in OUTBOX:
+        if kind == "text" and text.startswith("⚠️"):
+            return text
+    if not EXPECTED_REPLY[name](OUTBOX):
+        return "balasan yang diharapkan tidak ada"
+    return None
+
+
+OPERATIONS = ["save_airdrop", "list_airdrop", "delete_airdrop", "reminder_sett_choose", "reminder_airdrop_job", "download_data"]
+
+
+async def measure(ops, name, iterations):
+    setup = getattr(ops, name)
+    latencies = []
+    written = 0
+    failures = []
+    for _ in range(iterations):
+        coroutine = await setup()
+        OUTBOX.clear()
+        before = bytes_written()
+        started = time.perf_counter()
+        await coroutine
+        latencies.append((time.perf_counter() - started) * 1000)
+        after = bytes_written()
+        if before is not None and after is not None:
+            written += after - before
+        failure = check_replies(name)
+        if failure:
+            failures.append(failure)
+    # Satu putaran tambahan dengan tracemalloc untuk puncak alokasi (tidak ikut latensi)
+    coroutine = await setup()
+    OUTBOX.clear()
+    tracemalloc.start()
+    await coroutine
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "operation": name,
+        "iterations": iterations,
+        # Putaran yang gagal (balasan error); angka latensi baris ini tidak bisa dibandingkan
+        "failed": len(failures),
+        "failure": failures[0] if failures else None,
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "peak_kib": round(peak / 1024, 1),
+        "bytes_written_per_op": round(written / iterations) if bytes_written() is not None else None,
+    }
+
+
+async def run_dataset(rows, iterations, seed, operations):
+    ops = Operations(rows, seed)
+    await ops.prepare()
+    results = []
+    for name in operations:
+        results.append(await measure(ops, name, iterations))
+    return results
+
+
+def run_worker(rows, wallets, iterations, seed, operations, output):
+    """Dijalankan di subprocess dengan folder sementara sebagai cwd: buat data, ukur, tulis hasil ke output."""
+    generate_dataset(os.getcwd(), rows, wallets, seed)
+    random.seed(seed)
+    started = time.perf_counter()
+    bot.STORAGE_EXECUTOR.submit(bot.init_storage).result()
+    startup_ms = (time.perf_counter() - started) * 1000
+    results = asyncio.run(run_dataset(rows, iterations, seed, operations))
+    results.insert(0, {"operation": "startup (migrasi + cache)", "iterations": 1, "failed": 0, "failure": None,
+                       "p50_ms": round(startup_ms, 3),
+                       "p95_ms": round(startup_ms, 3), "peak_kib": None, "bytes_written_per_op": None})
+    bot.STORAGE_EXECUTOR.submit(bot.close_storage).result()
+    bot.STORAGE_EXECUTOR.shutdown(wait=True)
+    with open(output, "w") as f:
+        json.dump(results, f)
+
+
+def benchmark_rows(rows, wallets, iterations, seed, operations):
+    """Jalankan semua operasi untuk satu ukuran data di subprocess baru dan folder sementara."""
+    with tempfile.TemporaryDirectory(prefix="airdrop-bench-") as directory:
+        output = os.path.join(directory, "result.json")
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", "--rows", str(rows), "--wallets", str(wallets),
+             "--iterations", str(iterations),
+             "--seed", str(seed), "--ops", ",".join(operations), "--json", output],
+            cwd=directory, check=True,
+        )
+        with open(output) as f:
+            return json.load(f)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(rows, wallets, results):
+    print(f"\n== {rows} baris, {wallets} wallet ==")
+    print(f"{'operasi':<28}{'p50 ms':>10}{'p95 ms':>10}{'peak KiB':>11}{'byte/op':>12}{'gagal':>7}")
+    for r in results:
+        peak = "-" if r["peak_kib"] is None else r["peak_kib"]
+        written = "-" if r["bytes_written_per_op"] is None else r["bytes_written_per_op"]
+        print(f"{r['operation']:<28}{r['p50_ms']:>10}{r['p95_ms']:>10}{peak:>11}{written:>12}{r['failed']:>7}")
+    for r in results:
+        if r["failed"]:
+            print(f"  ! {r['operation']} gagal {r['failed']}x: {r['failure']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark handler bot dengan data sintetis.")
+    parser.add_argument("--rows", default="1000,10000", help="ukuran data dipisah koma (contoh 1000,10000,100000)")
+    parser.add_argument("--wallets", type=int, help="jumlah wallet per dataset (default: sama dengan jumlah baris)")
+    parser.add_argument("--iterations", type=int, default=20, help="jumlah pengulangan per operasi")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--ops", default=",".join(OPERATIONS), help="operasi yang dijalankan (dipisah koma)")
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    operations = [name for name in args.ops.split(",") if name]
+    unknown = set(operations) - set(OPERATIONS)
+    if unknown:
+        parser.error(f"operasi tidak dikenal: {', '.join(sorted(unknown))}")
+    if args.worker:
+        run_worker(int(args.rows), int(args.wallets), args.iterations, args.seed, operations, args.json)
+        return
+    report = {"revision": git_revision(), "seed": args.seed, "iterations": args.iterations,
+              "python": sys.version.split()[0],
+              "wallets": args.wallets if args.wallets is not None else "rows", "datasets": {}}
+    for rows in (int(v) for v in args.rows.split(",") if v):
+        # Default: jumlah wallet ikut ukuran data (file wallet JSON juga 1k-100k baris)
+        wallets = args.wallets if args.wallets is not None else rows
+        results = benchmark_rows(rows, wallets, args.iterations, args.seed, operations)
+        report["datasets"][rows] = results
+        print_table(rows, wallets, results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if any(r["failed"] for results in report["datasets"].values() for r in results):
+        sys.exit("Sebagian operasi gagal: angka latensinya tidak bisa dibandingkan antar revisi.")
+
+
+if __name__ == "__main__":
+    main()
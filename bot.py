@@ -1,24 +1,47 @@
+import asyncio
+import contextlib
+import csv
+import gzip
+import heapq
+import hmac
+import io
 import logging
 import os
 import json
-from functools import wraps
+import random
+import re
+import secrets
+import signal
+import sqlite3
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import RetryAfter
 from telegram.ext import (
     Application,
+    BaseRateLimiter,
+    BaseUpdateProcessor,
     CommandHandler,
     CallbackQueryHandler,
     ConversationHandler,
     MessageHandler,
+    TypeHandler,
+    ApplicationHandlerStop,
     ContextTypes,
     filters,
 )
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Alignment, Font
 
 load_dotenv()
 ADMIN_ID = int(os.getenv("ADMIN_ID", "0"))
+# User lain yang boleh memakai bot (dipisah koma). Data setiap user terpisah (kolom owner).
+ALLOWED_USERS = {ADMIN_ID} | {int(v) for v in os.getenv("ALLOWED_USERS", "").replace(" ", "").split(",") if v}
 
 logging.basicConfig(format="%(asctime)s - %(name)s - %(levelname)s - %(message)s", level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -30,99 +53,1501 @@ INPUT_WALLET_ADDRESS, CHOOSE_WALLET_TYPE, INPUT_CHAIN = range(1, 4)
 INPUT_AIRDROP_LINK, INPUT_AIRDROP_TITLE, CHOOSE_AIRDROP_TYPE, CHOOSE_WALLET = range(10, 14)
 CHOOSE_WALLET_DELETE = 20
 CHOOSE_AIRDROP_DELETE = 30
+CHOOSE_AIRDROP_FINISH = 31
 REMINDER_SETT_MODE, REMINDER_SETT_DELAY, REMINDER_SETT_CHOOSE = range(50, 53)
 STOP_REMINDER_CHOOSE = 60
+SEARCH_INPUT = 70
+
+# Batas Telegram untuk satu pesan teks
+MAX_MESSAGE_LENGTH = 4096
+# Jumlah airdrop per halaman di List Airdrop Saved
+LIST_PAGE_SIZE = int(os.getenv("LIST_PAGE_SIZE", "10"))
+# Jumlah tombol per halaman pada keyboard pilihan (hapus, reminder, wallet)
+PICKER_PAGE_SIZE = int(os.getenv("PICKER_PAGE_SIZE", "8"))
+# Maksimal entry cache render (teks entry & tombol airdrop), dikosongkan jika penuh
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "20000"))
+# Isi kolom yang lebih panjang dari ini dipotong agar satu entry selalu muat dalam satu pesan
+MAX_FIELD_LENGTH = 200
+
+# Import massal dari file CSV/XLSX yang dikirim ke bot
+IMPORT_MAX_BYTES = 20 * 1024 * 1024  # batas download file oleh bot dari Telegram
+IMPORT_MAX_ERRORS_SHOWN = 10
+# Nama header yang dikenali (huruf besar/kecil diabaikan) -> kolom
+IMPORT_HEADERS = {
+    "LINK AIRDROP": "link", "LINK": "link",
+    "AIRDROP NAME": "title", "TITLE": "title", "JUDUL": "title",
+    "AIRDROP TYPE": "type", "TYPE": "type", "JENIS": "type",
+    "WALLET ADDRESS": "wallet", "WALLET": "wallet",
+    "CHAIN": "chain",
+    "DATE & TIME": "created_at", "CREATED_AT": "created_at",
+}
+
+# Scheduler reminder: satu job berkala (tick) yang mengirim semua reminder yang jatuh tempo
+# dalam jendela REMINDER_BATCH_WINDOW sebagai satu pesan digest per chat.
+REMINDER_TICK = int(os.getenv("REMINDER_TICK", "30"))  # detik
+REMINDER_BATCH_WINDOW = int(os.getenv("REMINDER_BATCH_WINDOW", "60"))  # detik
+AUTO_REMINDER_INTERVAL = 21600  # 21600 detik = 6 jam (4x sehari)
+# Saat restart, reminder dipulihkan dengan fase aslinya ditambah jitter acak (maks detik ini)
+# supaya ratusan reminder tidak terkirim bersamaan.
+REMINDER_RESTORE_JITTER = int(os.getenv("REMINDER_RESTORE_JITTER", "300"))
+
+# Antrian pesan keluar: batas global & per chat (token bucket), lihat OutboundQueue
+OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "30"))  # pesan/detik untuk seluruh bot
+OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))  # pesan/detik per chat pribadi
+OUTBOUND_CHAT_BURST = float(os.getenv("OUTBOUND_CHAT_BURST", "3"))
+OUTBOUND_GROUP_RATE = float(os.getenv("OUTBOUND_GROUP_RATE", str(20 / 60)))  # pesan/detik per grup
+OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "3"))
+# Prioritas pesan keluar (dikirim lewat rate_limit_args). Balasan interaktif didahulukan.
+PRIORITY_HIGH = 0
+PRIORITY_LOW = 1
 
 # Konversi dari pixel ke nilai column width openpyxl
 PIXEL_WIDTH = 314
 COLUMN_WIDTH = (PIXEL_WIDTH - 5) / 7  # ≈ 44.2
 
-def get_workbook():
+EXCEL_HEADER = ["ID", "LINK AIRDROP", "AIRDROP NAME", "AIRDROP TYPE", "WALLET ADDRESS", "DATE & TIME"]
+EXCEL_COLUMNS = ["A", "B", "C", "D", "E", "F"]
+
+# Alamat Bot API. Bisa diarahkan ke server Bot API lokal atau server tiruan (loadtest.py).
+BOT_API_BASE_URL = os.getenv("BOT_API_BASE_URL", "https://api.telegram.org/bot")
+BOT_API_BASE_FILE_URL = os.getenv("BOT_API_BASE_FILE_URL", "https://api.telegram.org/file/bot")
+
+# Mode penerimaan update: "polling" (default) atau "webhook"
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+# Webhook: URL publik (opsional, jika diisi webhook didaftarkan otomatis ke Telegram),
+# alamat listen lokal, path endpoint dan secret token untuk verifikasi request dari Telegram.
+# Secret wajib: jika kosong dan WEBHOOK_URL diisi, secret acak dibuat setiap start;
+# tanpa keduanya mode webhook menolak berjalan (siapa pun bisa mengirim Update palsu).
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_MAX_BODY = 1024 * 1024
+# Batas waktu membaca satu request utuh (request line, header dan body) pada server HTTP bawaan (detik)
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+# Batas jumlah & total ukuran header per request
+HTTP_MAX_HEADERS = 100
+HTTP_MAX_HEADER_BYTES = 16 * 1024
+
+# Archive: airdrop yang selesai (atau lebih tua dari ARCHIVE_AFTER_DAYS hari, 0 = tidak otomatis)
+# dipindah dari tabel airdrops (working set) ke airdrops_archive.
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "0"))
+ARCHIVE_CHECK_INTERVAL = 3600  # detik
+
+# Endpoint metrics format Prometheus (GET /metrics). 0 = tidak dijalankan.
+METRICS_LISTEN = os.getenv("METRICS_LISTEN", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Warm-up storage diulang sebanyak ini (jeda STORAGE_WARMUP_RETRY_DELAY * percobaan detik)
+# sebelum bot menyerah dan berhenti
+STORAGE_WARMUP_RETRIES = int(os.getenv("STORAGE_WARMUP_RETRIES", "3"))
+STORAGE_WARMUP_RETRY_DELAY = float(os.getenv("STORAGE_WARMUP_RETRY_DELAY", "2"))
+
+# Jumlah update yang boleh diproses bersamaan (update dari user yang sama tetap berurutan)
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "64"))
+
+# Folder hasil export (Download Data). Isinya hanya cache, boleh dihapus kapan saja.
+EXPORT_DIR = os.getenv("EXPORT_DIR", "exports")
+EXPORT_FORMATS = {"xlsx": ".xlsx", "csv": ".csv", "jsonl": ".jsonl.gz"}
+EXPORT_CACHE_SIZE = 16
+
+# Database utama. File Excel hanya dibuat saat data di-download,
+# file xlsx/json lama hanya dibaca sekali saat migrasi.
+DB_FILE = os.getenv("DB_FILE", "shareithub_data_airdrop.db")
+
+# Setiap commit hanya ditambahkan (append + fsync) ke file WAL, tidak menulis ulang database.
+# Kompaksi (checkpoint) melipat WAL ke file database utama secara berkala atau saat WAL
+# melewati batas ukuran. Saat start, SQLite otomatis me-replay WAL yang belum dilipat.
+WAL_COMPACT_INTERVAL = int(os.getenv("WAL_COMPACT_INTERVAL", "300"))  # detik
+WAL_COMPACT_BYTES = int(os.getenv("WAL_COMPACT_BYTES", str(4 * 1024 * 1024)))
+
+DB_TABLES = """
+CREATE TABLE IF NOT EXISTS airdrops (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner TEXT NOT NULL,
+    link TEXT NOT NULL,
+    title TEXT NOT NULL,
+    type TEXT NOT NULL,
+    wallet TEXT NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS wallets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    address TEXT NOT NULL,
+    chain TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS reminders (
+    chat_id INTEGER NOT NULL,
+    airdrop_id INTEGER NOT NULL,
+    interval INTEGER NOT NULL,
+    first_run REAL NOT NULL,
+    last_fired REAL,
+    PRIMARY KEY (chat_id, airdrop_id)
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS airdrops_archive (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    link TEXT NOT NULL,
+    title TEXT NOT NULL,
+    type TEXT NOT NULL,
+    wallet TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    archived_at TEXT NOT NULL,
+    reason TEXT NOT NULL
+);
+"""
+
+# Semua query airdrop selalu dibatasi satu owner, jadi index diawali owner
+DB_INDEXES = """
+DROP INDEX IF EXISTS idx_airdrops_type;
+DROP INDEX IF EXISTS idx_airdrops_wallet;
+DROP INDEX IF EXISTS idx_airdrops_created;
+CREATE INDEX IF NOT EXISTS idx_airdrops_owner ON airdrops(owner, id);
+CREATE INDEX IF NOT EXISTS idx_airdrops_owner_type ON airdrops(owner, type);
+CREATE INDEX IF NOT EXISTS idx_airdrops_owner_wallet ON airdrops(owner, wallet);
+CREATE INDEX IF NOT EXISTS idx_airdrops_owner_created ON airdrops(owner, created_at);
+CREATE INDEX IF NOT EXISTS idx_wallets_user ON wallets(user_id);
+CREATE INDEX IF NOT EXISTS idx_reminders_airdrop ON reminders(airdrop_id);
+CREATE INDEX IF NOT EXISTS idx_archive_owner ON airdrops_archive(owner, id);
+"""
+
+# Koneksi SQLite hanya dipakai oleh thread storage
+_db = None
+
+# Index airdrop di memori per owner: owner -> {ID airdrop -> baris} (urut sesuai ID).
+# Partisi owner dimuat saat pertama dipakai. Semua partisi dibuang jika database diubah
+# oleh koneksi lain (PRAGMA data_version), tulisan dari bot sendiri langsung memperbarui index ini.
+# "generation" (per owner) naik setiap kali bot sendiri mengubah data airdrop owner tersebut.
+# "index" berisi inverted index pencarian per owner: owner -> {token -> set(ID airdrop)}.
+# "links" & "wallets" adalah hash set untuk deteksi duplikat per owner:
+# (link, wallet) ternormalisasi -> ID airdrop, dan (address, chain) ternormalisasi -> ID wallet.
+# "summary" berisi counter ringkasan per owner (lihat _new_summary), diperbarui setiap tulisan.
+_airdrop_cache = {"version": None, "owners": {}, "generation": {}, "index": {}, "links": {}, "wallets": {}, "summary": {}}
+
+# Export yang sudah dibuat: (versi data, format, filter) -> path file
+_export_cache = {}
+
+# Hasil render per airdrop: (jenis, ID airdrop) -> (baris, teks Markdown / tombol).
+# Baris airdrop di cache tidak pernah diubah (tuple baru setiap perubahan), jadi hasil render
+# tetap valid selama barisnya sama. Entry dibuang saat airdrop diubah/dihapus (dari thread storage)
+# dan seluruhnya saat database diubah koneksi lain.
+_render_cache = {}
+RENDER_KINDS = ("entry", "reminder", "da", "fa", "rs")
+
+def cached_render(kind, airdrop_id, row, build):
+    """Hasil build(airdrop_id, row) dari cache render, dibuat ulang jika baris airdrop berubah."""
+    key = (kind, airdrop_id)
+    cached = _render_cache.get(key)
+    if cached is not None and (cached[0] is row or cached[0] == row):
+        return cached[1]
+    if len(_render_cache) >= RENDER_CACHE_SIZE:
+        # clear() atomik terhadap eviction dari thread storage (tanpa iterasi dict bersama)
+        _render_cache.clear()
+    value = build(airdrop_id, row)
+    _render_cache[key] = (row, value)
+    return value
+
+def _evict_render(airdrop_id):
+    for kind in RENDER_KINDS:
+        _render_cache.pop((kind, airdrop_id), None)
+
+def get_db():
+    """Buka database (sekali saja), aktifkan WAL dan jalankan migrasi jika perlu."""
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(DB_FILE)
+        _db.execute("PRAGMA journal_mode=WAL")
+        # FULL: WAL di-fsync setiap commit, jadi tulisan yang sudah dibalas ke user tidak hilang saat crash
+        _db.execute("PRAGMA synchronous=FULL")
+        # Checkpoint hanya dilakukan oleh compact_storage(), bukan di tengah request
+        _db.execute("PRAGMA wal_autocheckpoint=0")
+        _db.executescript(DB_TABLES)
+        upgrade_schema(_db)
+        _db.executescript(DB_INDEXES)
+        migrate_legacy_files(_db)
+    return _db
+
+def upgrade_schema(db):
+    """Tambahkan kolom yang belum ada di database versi lama."""
+    columns = {r[1] for r in db.execute("PRAGMA table_info(airdrops)")}
+    if "owner" not in columns:
+        # Sebelum mode multi-user semua airdrop milik ADMIN_ID
+        with db:
+            db.execute(f"ALTER TABLE airdrops ADD COLUMN owner TEXT NOT NULL DEFAULT '{ADMIN_ID}'")
+
+def migrate_legacy_files(db):
+    """
+    Import data dari file Excel & wallet JSON lama ke database.
+    Hanya dijalankan sekali, file lama tidak diubah.
+    """
+    if db.execute("SELECT 1 FROM meta WHERE key = 'legacy_migrated'").fetchone():
+        return
+    airdrop_count = 0
+    wallet_count = 0
+    with db:
+        if os.path.exists(EXCEL_FILE):
+            from openpyxl import load_workbook
+            wb = load_workbook(EXCEL_FILE, read_only=True)
+            for row in wb.active.iter_rows(min_row=2, values_only=True):
+                if len(row) >= 5 and any(row[:5]):
+                    db.execute(
+                        "INSERT INTO airdrops (owner, link, title, type, wallet, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                        (str(ADMIN_ID), *("" if v is None else str(v) for v in row[:5])),
+                    )
+                    airdrop_count += 1
+            wb.close()
+        if os.path.exists(WALLET_FILE):
+            with open(WALLET_FILE, "r") as f:
+                try:
+                    legacy_wallets = json.load(f)
+                except json.decoder.JSONDecodeError:
+                    legacy_wallets = {}
+            for user_id, user_wallets in legacy_wallets.items():
+                for w in user_wallets:
+                    db.execute(
+                        "INSERT INTO wallets (user_id, address, chain) VALUES (?, ?, ?)",
+                        (str(user_id), w["address"], w["chain"]),
+                    )
+                    wallet_count += 1
+        db.execute("INSERT INTO meta (key, value) VALUES ('legacy_migrated', ?)", (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),))
+    if airdrop_count or wallet_count:
+        logger.info("Migrasi selesai: %d airdrop, %d wallet diimport ke %s", airdrop_count, wallet_count, DB_FILE)
+
+def init_storage():
+    """Pastikan database tersedia dan cache airdrop terisi."""
+    get_db()
+    read_airdrops(str(ADMIN_ID))
+    # Export lama dari proses sebelumnya tidak lagi tercatat di cache. Hanya file buatan
+    # build_export yang dihapus: EXPORT_DIR bisa saja berisi file lain (atau folder kerja bot).
+    if os.path.isdir(EXPORT_DIR):
+        for name in os.listdir(EXPORT_DIR):
+            path = os.path.join(EXPORT_DIR, name)
+            if not _is_export_file(name) or not os.path.isfile(path) or os.path.islink(path):
+                continue
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.warning("Gagal menghapus export lama %s: %s", path, e)
+
+def _is_export_file(name):
+    """Nama file yang dibuat build_export: export_<ns><suffix format>, atau versi .tmp-nya."""
+    if not name.startswith("export_"):
+        return False
+    if name.endswith(".tmp"):
+        name = name[:-len(".tmp")]
+    return any(name.endswith(suffix) for suffix in EXPORT_FORMATS.values())
+
+def _wal_size():
+    wal_file = DB_FILE + "-wal"
+    return os.path.getsize(wal_file) if os.path.exists(wal_file) else 0
+
+def compact_storage(force=False):
+    """
+    Lipat isi WAL ke file database utama lalu kosongkan WAL.
+    Tanpa force, hanya dijalankan jika ukuran WAL sudah melewati WAL_COMPACT_BYTES.
+    Return True jika kompaksi dijalankan sampai selesai.
+    """
+    size = _wal_size()
+    if size == 0 or (not force and size < WAL_COMPACT_BYTES):
+        return False
+    busy, _, _ = get_db().execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    return not busy
+
+def close_storage():
+    """Tutup koneksi database (dipanggil saat bot berhenti)."""
+    global _db
+    if _db is not None:
+        compact_storage(force=True)
+        _db.close()
+        _db = None
+
+# Satu thread khusus yang memegang database.
+# Semua operasi baca/tulis diantrikan ke sini sehingga tulisan selalu berurutan
+# dan event loop tidak pernah terblokir oleh sqlite, openpyxl atau disk.
+STORAGE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="storage")
+
+class Histogram:
+    """Histogram latensi (detik) dengan bucket tetap, kompatibel dengan format Prometheus."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+
+    def observe(self, value, error=False):
+        i = 0
+        while i < len(self.buckets) and value > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.errors += error
+
+    def quantile(self, q):
+        """Perkiraan kuantil: batas atas bucket tempat kuantil tersebut jatuh."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            if cumulative >= rank:
+                return bound
+        return float("inf")
+
+class Metrics:
+    """
+    Kumpulan histogram per jenis ("handler", "storage", "job") dan nama operasi,
+    ditambah histogram keterlambatan reminder. Dipakai dari event loop dan thread storage.
+    """
+    LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+    LAG_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+
+    def __init__(self):
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self.reminder_lag = Histogram(self.LAG_BUCKETS)
+
+    def observe(self, kind, name, seconds, error=False):
+        with self._lock:
+            histogram = self._histograms.get((kind, name))
+            if histogram is None:
+                histogram = self._histograms[(kind, name)] = Histogram(self.LATENCY_BUCKETS)
+            histogram.observe(seconds, error)
+
+    def observe_lag(self, seconds):
+        with self._lock:
+            self.reminder_lag.observe(max(0.0, seconds))
+
+    def snapshot(self, kind):
+        """List (nama, Histogram) untuk satu jenis, diurutkan dari yang paling sering dipanggil."""
+        with self._lock:
+            items = [(name, h) for (k, name), h in self._histograms.items() if k == kind]
+        return sorted(items, key=lambda item: -item[1].count)
+
+METRICS = Metrics()
+
+def _timed_call(kind, name, func):
+    started = time.perf_counter()
+    error = False
+    try:
+        return func()
+    except Exception:
+        error = True
+        raise
+    finally:
+        METRICS.observe(kind, name, time.perf_counter() - started, error)
+
+def timed_callback(kind, callback):
+    """Bungkus callback async (handler/job) agar latensi & error-nya tercatat di METRICS."""
+    @wraps(callback)
+    async def wrapped(*args, **kwargs):
+        started = time.perf_counter()
+        error = False
+        try:
+            return await callback(*args, **kwargs)
+        except ApplicationHandlerStop:
+            raise
+        except Exception:
+            error = True
+            raise
+        finally:
+            METRICS.observe(kind, callback.__name__, time.perf_counter() - started, error)
+    return wrapped
+
+async def run_storage(func, *args, **kwargs):
+    """Jalankan operasi storage di thread storage dan tunggu hasilnya (durasi eksekusinya dicatat)."""
+    loop = asyncio.get_running_loop()
+    name = getattr(func, "__name__", "storage")
+    return await loop.run_in_executor(STORAGE_EXECUTOR, partial(_timed_call, "storage", name, partial(func, *args, **kwargs)))
+
+def _data_version(db):
+    return db.execute("PRAGMA data_version").fetchone()[0]
+
+def read_airdrops(owner):
+    """
+    Ambil index airdrop milik owner {id: (link, title, type, wallet, created_at)}.
+    Hasilnya dipakai bersama (cache), jangan diubah oleh pemanggil.
+    """
+    db = get_db()
+    _sync_cache(db)
+    records = _airdrop_cache["owners"].get(owner)
+    if records is None:
+        fetched = db.execute(
+            "SELECT id, link, title, type, wallet, created_at FROM airdrops WHERE owner = ? ORDER BY id", (owner,)
+        ).fetchall()
+        records = {r[0]: tuple(r[1:]) for r in fetched}
+        links = {}
+        summary = _new_summary()
+        for airdrop_id, row in records.items():
+            links.setdefault(airdrop_key(row), airdrop_id)
+            _count_airdrop(summary, row, 1)
+        _airdrop_cache["owners"][owner] = records
+        _airdrop_cache["links"][owner] = links
+        _airdrop_cache["summary"][owner] = summary
+    return records
+
+def _new_summary():
+    return {"total": 0, "type": Counter(), "wallet": Counter(), "week": Counter(), "month": Counter()}
+
+def _count_airdrop(summary, row, delta):
+    """Tambah (delta=1) atau kurangi (delta=-1) counter ringkasan untuk satu baris airdrop."""
+    summary["total"] += delta
+    summary["type"][row[2]] += delta
+    summary["wallet"][row[3]] += delta
+    try:
+        created = datetime.strptime(row[4], "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return
+    summary["week"][created.strftime("%G-W%V")] += delta
+    summary["month"][created.strftime("%Y-%m")] += delta
+
+def airdrop_summary(owner, now=None):
+    """Ringkasan data airdrop owner dari counter (tanpa membaca ulang semua baris)."""
+    read_airdrops(owner)
+    summary = _airdrop_cache["summary"][owner]
+    now = now or datetime.now()
+    return {
+        "total": summary["total"],
+        "type": {name: n for name, n in summary["type"].items() if n > 0},
+        "wallet": sorted(((w, n) for w, n in summary["wallet"].items() if n > 0), key=lambda item: -item[1]),
+        "this_week": summary["week"][now.strftime("%G-W%V")],
+        "this_month": summary["month"][now.strftime("%Y-%m")],
+    }
+
+def _sync_cache(db):
+    """Buang semua cache per owner jika database diubah oleh koneksi lain."""
+    version = _data_version(db)
+    if _airdrop_cache["version"] != version:
+        _airdrop_cache.update(version=version, owners={}, index={}, links={}, wallets={}, summary={})
+        _render_cache.clear()
+
+def normalize_link(link):
+    """Link untuk perbandingan duplikat: tanpa skema, www., garis miring akhir dan beda huruf besar/kecil."""
+    link = str(link).strip().lower()
+    for prefix in ("https://", "http://"):
+        if link.startswith(prefix):
+            link = link[len(prefix):]
+    if link.startswith("www."):
+        link = link[4:]
+    return link.rstrip("/")
+
+def normalize_address(address):
+    """Address EVM (0x..) tidak membedakan huruf besar/kecil, address chain lain dibiarkan apa adanya."""
+    address = str(address).strip()
+    return address.lower() if address.lower().startswith("0x") else address
+
+def airdrop_key(row):
+    return (normalize_link(row[0]), normalize_address(row[3]))
+
+def wallet_key(address, chain):
+    return (normalize_address(address), str(chain).strip().upper())
+
+def find_duplicate_airdrop(owner, link, wallet):
+    """ID airdrop milik owner dengan link & wallet yang sama, None jika belum ada."""
+    read_airdrops(owner)
+    return _airdrop_cache["links"][owner].get(airdrop_key((link, None, None, wallet)))
+
+def _remember_airdrop(owner, airdrop_id, row):
+    _evict_render(airdrop_id)
+    _airdrop_cache["owners"][owner][airdrop_id] = row
+    _airdrop_cache["links"][owner].setdefault(airdrop_key(row), airdrop_id)
+    _count_airdrop(_airdrop_cache["summary"][owner], row, 1)
+    _index_airdrop(owner, airdrop_id, row)
+
+def _forget_airdrop(owner, airdrop_id):
+    row = _airdrop_cache["owners"][owner].pop(airdrop_id)
+    _evict_render(airdrop_id)
+    _count_airdrop(_airdrop_cache["summary"][owner], row, -1)
+    links = _airdrop_cache["links"][owner]
+    key = airdrop_key(row)
+    if links.get(key) == airdrop_id:
+        del links[key]
+    _unindex_airdrop(owner, airdrop_id, row)
+
+def _bump_generation(owner):
+    _airdrop_cache["generation"][owner] = _airdrop_cache["generation"].get(owner, 0) + 1
+
+def get_airdrop(owner, airdrop_id: int):
+    """Ambil satu airdrop milik owner berdasarkan ID, None jika tidak ada."""
+    return read_airdrops(owner).get(airdrop_id)
+
+def append_airdrop_row(owner, new_row):
+    """
+    Tambahkan airdrop baru milik owner. Link yang sudah tersimpan untuk wallet yang sama ditolak.
+    Return (ID airdrop, True jika baru disimpan / False jika duplikat).
+    """
+    duplicate = find_duplicate_airdrop(owner, new_row[0], new_row[3])
+    if duplicate is not None:
+        return duplicate, False
+    db = get_db()
+    with db:
+        cur = db.execute(
+            "INSERT INTO airdrops (owner, link, title, type, wallet, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (owner, *new_row),
+        )
+    _remember_airdrop(owner, cur.lastrowid, tuple(new_row))
+    _bump_generation(owner)
+    compact_storage()
+    return cur.lastrowid, True
+
+def remove_airdrop(owner, airdrop_id: int):
+    """Hapus airdrop milik owner berdasarkan ID. Return True jika berhasil."""
+    records = read_airdrops(owner)
+    if airdrop_id not in records:
+        return False
+    db = get_db()
+    with db:
+        db.execute("DELETE FROM airdrops WHERE id = ? AND owner = ?", (airdrop_id, owner))
+        db.execute("DELETE FROM reminders WHERE airdrop_id = ?", (airdrop_id,))
+    _forget_airdrop(owner, airdrop_id)
+    _bump_generation(owner)
+    compact_storage()
+    return True
+
+def read_airdrop_page(owner, cursor: int, backward: bool = False, limit: int = LIST_PAGE_SIZE, archived: bool = False):
+    """
+    Ambil satu halaman airdrop milik owner dengan cursor ID (keyset pagination),
+    hanya baris halaman itu yang dibaca. Maju: ID > cursor, mundur: ID < cursor.
+    archived=True membaca tabel archive. Return (records, has_prev, has_next) dengan records berupa list (id, row).
+    """
+    db = get_db()
+    table = "airdrops_archive" if archived else "airdrops"
+    columns = f"SELECT id, link, title, type, wallet, created_at FROM {table} WHERE owner = ?"
+    exists = f"SELECT 1 FROM {table} WHERE owner = ?"
+    if backward:
+        fetched = db.execute(f"{columns} AND id < ? ORDER BY id DESC LIMIT ?", (owner, cursor, limit + 1)).fetchall()
+        has_prev = len(fetched) > limit
+        fetched = fetched[:limit][::-1]
+        has_next = bool(fetched) and db.execute(f"{exists} AND id > ? LIMIT 1", (owner, fetched[-1][0])).fetchone() is not None
+    else:
+        fetched = db.execute(f"{columns} AND id > ? ORDER BY id LIMIT ?", (owner, cursor, limit + 1)).fetchall()
+        has_next = len(fetched) > limit
+        fetched = fetched[:limit]
+        has_prev = bool(fetched) and db.execute(f"{exists} AND id < ? LIMIT 1", (owner, fetched[0][0])).fetchone() is not None
+    return [(r[0], tuple(r[1:])) for r in fetched], has_prev, has_next
+
+def _archive_rows(db, rows, reason):
+    """
+    Pindahkan baris (owner, id) dari airdrops ke airdrops_archive (di dalam transaksi pemanggil).
+    Cache diperbarui terpisah oleh _forget_archived setelah transaksi commit.
+    """
+    archived_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for owner, airdrop_id in rows:
+        db.execute(
+            "INSERT INTO airdrops_archive (id, owner, link, title, type, wallet, created_at, archived_at, reason) "
+            "SELECT id, owner, link, title, type, wallet, created_at, ?, ? FROM airdrops WHERE id = ?",
+            (archived_at, reason, airdrop_id),
+        )
+        db.execute("DELETE FROM airdrops WHERE id = ?", (airdrop_id,))
+        db.execute("DELETE FROM reminders WHERE airdrop_id = ?", (airdrop_id,))
+
+def _forget_archived(rows):
+    for owner, airdrop_id in rows:
+        if owner in _airdrop_cache["owners"]:
+            _forget_airdrop(owner, airdrop_id)
+    for owner in {owner for owner, _ in rows}:
+        _bump_generation(owner)
+
+def archive_airdrop(owner, airdrop_id: int, reason="finished"):
+    """Pindahkan airdrop milik owner ke archive (reminder-nya ikut dihapus). Return True jika berhasil."""
+    if airdrop_id not in read_airdrops(owner):
+        return False
+    db = get_db()
+    with db:
+        _archive_rows(db, [(owner, airdrop_id)], reason)
+    _forget_archived([(owner, airdrop_id)])
+    compact_storage()
+    return True
+
+def archive_expired(max_age_days=ARCHIVE_AFTER_DAYS):
+    """Archive semua airdrop (semua owner) yang lebih tua dari max_age_days hari. Return list (owner, id)."""
+    cutoff = (datetime.now() - timedelta(days=max_age_days)).strftime("%Y-%m-%d %H:%M:%S")
+    db = get_db()
+    rows = db.execute("SELECT owner, id FROM airdrops WHERE created_at < ? ORDER BY id", (cutoff,)).fetchall()
+    if rows:
+        with db:
+            _archive_rows(db, rows, "expired")
+        _forget_archived(rows)
+        compact_storage(force=True)
+    return rows
+
+def restore_airdrop(owner, airdrop_id: int):
+    """
+    Kembalikan airdrop dari archive ke working set dengan ID yang sama.
+    Return "restored", "missing" (tidak ada di archive) atau "duplicate" (link & wallet sudah ada lagi).
+    """
+    db = get_db()
+    row = db.execute(
+        "SELECT link, title, type, wallet, created_at FROM airdrops_archive WHERE id = ? AND owner = ?", (airdrop_id, owner)
+    ).fetchone()
+    if row is None:
+        return "missing"
+    if find_duplicate_airdrop(owner, row[0], row[3]) is not None:
+        return "duplicate"
+    with db:
+        db.execute(
+            "INSERT INTO airdrops (id, owner, link, title, type, wallet, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (airdrop_id, owner, *row),
+        )
+        db.execute("DELETE FROM airdrops_archive WHERE id = ?", (airdrop_id,))
+    _remember_airdrop(owner, airdrop_id, tuple(row))
+    _bump_generation(owner)
+    compact_storage()
+    return "restored"
+
+def read_airdrop_slice(owner, offset: int, limit: int, airdrop_type=None, wallet_id=None):
+    """
+    Ambil satu potongan airdrop milik owner (untuk keyboard pilihan), opsional difilter
+    jenis dan/atau wallet (ID di tabel wallets). Return (records, has_next).
+    """
+    conditions = ["owner = ?"]
+    params = [owner]
+    if airdrop_type:
+        conditions.append("type = ?")
+        params.append(airdrop_type)
+    if wallet_id is not None:
+        conditions.append("wallet = (SELECT address FROM wallets WHERE id = ? AND user_id = ?)")
+        params.extend([wallet_id, owner])
+    fetched = get_db().execute(
+        f"SELECT id, link, title, type, wallet, created_at FROM airdrops WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ? OFFSET ?",
+        (*params, limit + 1, offset),
+    ).fetchall()
+    return [(r[0], tuple(r[1:])) for r in fetched[:limit]], len(fetched) > limit
+
+def get_airdrops(keys):
+    """
+    Ambil beberapa airdrop sekaligus dalam satu panggilan storage.
+    keys: iterable (owner, id). Return {(owner, id): row atau None}.
+    """
+    return {(owner, airdrop_id): read_airdrops(owner).get(airdrop_id) for owner, airdrop_id in keys}
+
+# Kolom yang bisa dicari: link, judul, jenis, wallet
+SEARCH_COLUMNS = range(4)
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+def tokenize(text):
+    return set(_TOKEN_RE.findall(str(text).lower()))
+
+def _row_tokens(row):
+    tokens = set()
+    for i in SEARCH_COLUMNS:
+        tokens |= tokenize(row[i])
+    return tokens
+
+def search_index(owner):
+    """Inverted index milik owner {token: set(ID airdrop)}, dibangun sekali lalu diperbarui per tulisan."""
+    records = read_airdrops(owner)
+    index = _airdrop_cache["index"].get(owner)
+    if index is None:
+        index = {}
+        for airdrop_id, row in records.items():
+            for token in _row_tokens(row):
+                index.setdefault(token, set()).add(airdrop_id)
+        _airdrop_cache["index"][owner] = index
+    return index
+
+def _index_airdrop(owner, airdrop_id, row):
+    index = _airdrop_cache["index"].get(owner)
+    if index is None:
+        return  # belum pernah dipakai, nanti dibangun lengkap saat pencarian pertama
+    for token in _row_tokens(row):
+        index.setdefault(token, set()).add(airdrop_id)
+
+def _unindex_airdrop(owner, airdrop_id, row):
+    index = _airdrop_cache["index"].get(owner)
+    if index is None:
+        return
+    for token in _row_tokens(row):
+        ids = index.get(token)
+        if ids is not None:
+            ids.discard(airdrop_id)
+            if not ids:
+                del index[token]
+
+def search_airdrop_page(owner, terms, cursor: int, backward: bool = False, limit: int = LIST_PAGE_SIZE):
+    """
+    Cari airdrop milik owner yang memuat semua token di terms (di link, judul, jenis atau wallet).
+    Paging sama seperti read_airdrop_page: cursor ID, return (records, has_prev, has_next).
+    """
+    index = search_index(owner)
+    postings = sorted((index.get(token, set()) for token in terms), key=len)
+    if not postings or not postings[0]:
+        return [], False, False
+    matches = sorted(postings[0].intersection(*postings[1:]))
+    if backward:
+        end = bisect_left(matches, cursor)
+        start = max(0, end - limit)
+    else:
+        start = bisect_right(matches, cursor)
+        end = start + limit
+    records = read_airdrops(owner)
+    page = [(airdrop_id, records[airdrop_id]) for airdrop_id in matches[start:end]]
+    return page, start > 0, end < len(matches)
+
+def save_reminder(chat_id, airdrop_id, interval, first_run):
+    """Simpan (atau ganti) definisi reminder agar bisa dipulihkan setelah restart."""
+    db = get_db()
+    with db:
+        db.execute(
+            "INSERT OR REPLACE INTO reminders (chat_id, airdrop_id, interval, first_run, last_fired) VALUES (?, ?, ?, ?, NULL)",
+            (chat_id, airdrop_id, interval, first_run),
+        )
+    compact_storage()
+
+def delete_reminder(chat_id, airdrop_id):
+    db = get_db()
+    with db:
+        db.execute("DELETE FROM reminders WHERE chat_id = ? AND airdrop_id = ?", (chat_id, airdrop_id))
+    compact_storage()
+
+def mark_reminders_fired(served):
+    """
+    Catat fase terakhir yang sudah terkirim untuk banyak reminder sekaligus.
+    served: list (chat_id, airdrop_id, fase). Yang disimpan adalah jadwal yang dilayani, bukan jam
+    kirim: digest dikirim sampai REMINDER_BATCH_WINDOW lebih awal dari jadwalnya.
+    """
+    db = get_db()
+    with db:
+        db.executemany(
+            "UPDATE reminders SET last_fired = ? WHERE chat_id = ? AND airdrop_id = ?",
+            [(phase, chat_id, airdrop_id) for chat_id, airdrop_id, phase in served],
+        )
+    compact_storage()
+
+def load_reminders():
+    """Ambil semua definisi reminder yang tersimpan."""
+    records = get_db().execute("SELECT chat_id, airdrop_id, interval, first_run, last_fired FROM reminders").fetchall()
+    return [
+        {"chat_id": r[0], "airdrop_id": r[1], "interval": r[2], "first_run": r[3], "last_fired": r[4]}
+        for r in records
+    ]
+
+def data_version(owner):
+    """Versi data airdrop owner saat ini; berubah setiap ada tulisan dari bot maupun dari luar."""
+    read_airdrops(owner)
+    return (_airdrop_cache["version"], _airdrop_cache["generation"].get(owner, 0))
+
+# Sumber data export: working set, archive atau keduanya
+EXPORT_TIERS = {
+    "hot": "airdrops",
+    "archive": "airdrops_archive",
+    "all": "(SELECT id, owner, link, title, type, wallet, created_at FROM airdrops "
+           "UNION ALL SELECT id, owner, link, title, type, wallet, created_at FROM airdrops_archive)",
+}
+
+def _export_rows(owner, airdrop_type=None, wallet=None, date_from=None, date_to=None, tier="hot"):
+    """Iterator baris export milik owner langsung dari cursor database (tidak dimuat semua ke memori)."""
+    conditions = ["owner = ?"]
+    params = [owner]
+    if airdrop_type:
+        conditions.append("type = ?")
+        params.append(airdrop_type)
+    if wallet:
+        conditions.append("wallet = ?")
+        params.append(wallet)
+    if date_from:
+        conditions.append("created_at >= ?")
+        params.append(f"{date_from} 00:00:00")
+    if date_to:
+        conditions.append("created_at <= ?")
+        params.append(f"{date_to} 23:59:59")
+    return get_db().execute(
+        f"SELECT id, link, title, type, wallet, created_at FROM {EXPORT_TIERS[tier]} WHERE {' AND '.join(conditions)} ORDER BY id",
+        params,
+    )
+
+def _write_xlsx_export(path, rows):
+    # openpyxl cukup berat, baru diimport saat pertama kali dibutuhkan
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Alignment, Font
+    # write_only: baris langsung ditulis ke file, workbook tidak disimpan di memori
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("AirdropData")
+    for col in EXCEL_COLUMNS:
+        ws.column_dimensions[col].width = COLUMN_WIDTH
+    header = []
+    for title in EXCEL_HEADER:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = Font(bold=True)
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+        header.append(cell)
+    ws.append(header)
+    for row in rows:
+        ws.append(list(row))
+    wb.save(path)
+
+def _write_csv_export(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(EXCEL_HEADER)
+        writer.writerows(rows)
+
+def _write_jsonl_export(path, rows):
+    keys = ["id", "link", "title", "type", "wallet", "created_at"]
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(dict(zip(keys, row)), ensure_ascii=False) + "\n")
+
+EXPORT_WRITERS = {"xlsx": _write_xlsx_export, "csv": _write_csv_export, "jsonl": _write_jsonl_export}
+
+def _remove_export(key):
+    path = _export_cache.pop(key)
+    if os.path.exists(path):
+        os.remove(path)
+
+def build_export(owner, fmt, airdrop_type=None, wallet=None, date_from=None, date_to=None, tier="hot"):
     """
-    Jika file Excel sudah ada, load file tersebut.
-    Jika tidak, buat workbook baru dengan header dan format sesuai.
+    Buat file export (streaming) data milik owner dari snapshot database saat ini.
+    Jika data belum berubah sejak export yang sama terakhir dibuat, file lama langsung dipakai.
+    Return (cache_key, path).
     """
-    if os.path.exists(EXCEL_FILE):
-        wb = load_workbook(EXCEL_FILE)
+    version = data_version(owner)
+    key = (owner, version, fmt, airdrop_type, wallet, date_from, date_to, tier)
+    path = _export_cache.get(key)
+    if path and os.path.exists(path):
+        return key, path
+    # Export owner ini dari versi data lama tidak akan terpakai lagi
+    for old_key in [k for k in _export_cache if k[0] == owner and k[1] != version]:
+        _remove_export(old_key)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    path = os.path.join(EXPORT_DIR, f"export_{time.time_ns()}{EXPORT_FORMATS[fmt]}")
+    tmp_path = path + ".tmp"
+    db = get_db()
+    # Satu transaksi baca = snapshot yang konsisten selama file ditulis
+    db.execute("BEGIN")
+    try:
+        EXPORT_WRITERS[fmt](tmp_path, _export_rows(owner, airdrop_type, wallet, date_from, date_to, tier))
+    finally:
+        db.execute("COMMIT")
+    os.replace(tmp_path, path)
+    _export_cache[key] = path
+    # Buang export paling lama jika cache penuh
+    while len(_export_cache) > EXPORT_CACHE_SIZE:
+        _remove_export(next(iter(_export_cache)))
+    return key, path
+
+def read_file_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def _iter_import_rows(fmt, data):
+    """Iterator (nomor baris, dict kolom) dari file CSV/XLSX, dibaca baris per baris."""
+    if fmt == "xlsx":
+        from openpyxl import load_workbook
+        wb = load_workbook(io.BytesIO(data), read_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            yield from _map_import_rows(rows)
+        finally:
+            wb.close()
     else:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "AirdropData"
-        # Header baru: LINK AIRDROP, AIRDROP NAME, AIRDROP TYPE, WALLET ADDRESS, DATE & TIME
-        header = ["LINK AIRDROP", "AIRDROP NAME", "AIRDROP TYPE", "WALLET ADDRESS", "DATE & TIME"]
-        ws.append(header)
-        # Set format header: bold, center alignment
-        for col in ws.iter_cols(min_row=1, max_row=1, min_col=1, max_col=5):
-            for cell in col:
-                cell.font = Font(bold=True)
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-        # Set lebar kolom untuk kolom A sampai E
-        for col in ["A", "B", "C", "D", "E"]:
-            ws.column_dimensions[col].width = COLUMN_WIDTH
-        wb.save(EXCEL_FILE)
-    return wb
-
-def save_workbook(wb):
-    wb.save(EXCEL_FILE)
+        text = io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline="")
+        yield from _map_import_rows(csv.reader(text))
+
+def _map_import_rows(rows):
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [IMPORT_HEADERS.get(str(name or "").strip().upper()) for name in header]
+    if "link" not in columns and "wallet" not in columns:
+        raise ValueError("header tidak dikenali")
+    for line, row in enumerate(rows, start=2):
+        values = {}
+        for column, value in zip(columns, row):
+            if column and value is not None:
+                values[column] = value.strftime("%Y-%m-%d %H:%M:%S") if isinstance(value, datetime) else str(value).strip()
+        if any(values.values()):
+            yield line, values
+
+def _validate_import_row(values):
+    """
+    Ubah satu baris import ke (airdrop_row atau None, (address, chain) atau None).
+    Baris tanpa link & judul dianggap baris wallet saja. Raise ValueError jika tidak valid.
+    """
+    address = values.get("wallet", "")
+    chain = values.get("chain", "").upper() or ("EVM" if address.lower().startswith("0x") else "OTHER")
+    wallet = (address, chain) if address else None
+    link, title = values.get("link", ""), values.get("title", "")
+    if not link and not title:
+        if wallet is None:
+            raise ValueError("baris kosong")
+        return None, wallet
+    if not link or not title:
+        raise ValueError("link dan judul wajib diisi")
+    if not address:
+        raise ValueError("wallet address wajib diisi")
+    airdrop_type = values.get("type", "").upper()
+    if airdrop_type not in AIRDROP_TYPE_CODES.values():
+        raise ValueError(f"jenis airdrop tidak valid: {airdrop_type or '(kosong)'}")
+    created_at = values.get("created_at", "")
+    if created_at:
+        try:
+            datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")
+        except ValueError:
+            raise ValueError(f"format waktu tidak valid: {created_at}")
+    else:
+        created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return (link.upper(), title.upper(), airdrop_type, address, created_at), wallet
+
+def import_file(owner, fmt, data):
+    """
+    Import airdrop & wallet milik owner dari file CSV/XLSX. Baris divalidasi dan
+    duplikat (dengan data lama maupun di dalam file) dilewati, lalu semua baris baru
+    ditulis dalam satu transaksi.
+    Return {"airdrops", "wallets", "skipped", "errors": [(baris, alasan)]}.
+    """
+    read_airdrops(owner)
+    seen_airdrops = set(_airdrop_cache["links"][owner])
+    seen_wallets = set(wallet_keys(owner))
+    new_airdrops, new_wallets, errors = [], [], []
+    skipped = 0
+    for line, values in _iter_import_rows(fmt, data):
+        try:
+            row, wallet = _validate_import_row(values)
+        except ValueError as e:
+            errors.append((line, str(e)))
+            continue
+        duplicate = True
+        if wallet is not None and wallet_key(*wallet) not in seen_wallets:
+            seen_wallets.add(wallet_key(*wallet))
+            new_wallets.append(wallet)
+            duplicate = False
+        if row is not None and airdrop_key(row) not in seen_airdrops:
+            seen_airdrops.add(airdrop_key(row))
+            new_airdrops.append(row)
+            duplicate = False
+        skipped += duplicate
+    if new_airdrops or new_wallets:
+        db = get_db()
+        wallet_ids, airdrop_ids = [], []
+        with db:
+            for address, chain in new_wallets:
+                cur = db.execute("INSERT INTO wallets (user_id, address, chain) VALUES (?, ?, ?)", (owner, address, chain))
+                wallet_ids.append(cur.lastrowid)
+            for row in new_airdrops:
+                cur = db.execute(
+                    "INSERT INTO airdrops (owner, link, title, type, wallet, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (owner, *row),
+                )
+                airdrop_ids.append(cur.lastrowid)
+        # Cache baru diperbarui setelah commit: jika transaksi gagal tidak ada baris hantu di cache
+        for (address, chain), wallet_id in zip(new_wallets, wallet_ids):
+            _airdrop_cache["wallets"][owner][wallet_key(address, chain)] = wallet_id
+        for row, airdrop_id in zip(new_airdrops, airdrop_ids):
+            _remember_airdrop(owner, airdrop_id, row)
+        _bump_generation(owner)
+        compact_storage()
+    return {"airdrops": len(new_airdrops), "wallets": len(new_wallets), "skipped": skipped, "errors": errors}
+
+class TokenBucket:
+    """Token bucket sederhana: rate token/detik, maksimal capacity token."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Detik sampai 1 token tersedia (0 jika sudah ada)."""
+        self.refill(now)
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+class OutboundQueue(BaseRateLimiter):
+    """
+    Semua request ke Bot API lewat sini. Request yang punya chat_id harus mendapat token
+    dari bucket global dan bucket chat tersebut; PRIORITY_LOW (reminder) hanya jalan jika
+    tidak ada PRIORITY_HIGH yang menunggu. RetryAfter menghentikan semua pengiriman selama
+    retry_after detik lalu request diulang (maks OUTBOUND_MAX_RETRIES kali).
+    """
+
+    def __init__(self):
+        self._global = TokenBucket(OUTBOUND_GLOBAL_RATE, OUTBOUND_GLOBAL_RATE)
+        self._chats = {}
+        # chat_id -> min-heap (priority, seq) request yang menunggu, agar urutan per chat tetap terjaga
+        self._chat_waiters = {}
+        self._seq = 0
+        self._paused_until = 0
+        self._waiting = {PRIORITY_HIGH: 0, PRIORITY_LOW: 0}
+        self._waits = deque(maxlen=1000)
+        self._counters = {"sent": 0, "retries": 0, "failed": 0}
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def _chat_bucket(self, chat_id):
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) > 512:
+                # Buang bucket yang sudah penuh lagi (chat yang tidak aktif)
+                now = time.monotonic()
+                for key, old in list(self._chats.items()):
+                    old.refill(now)
+                    if old.tokens >= old.capacity:
+                        del self._chats[key]
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            if is_group:
+                bucket = TokenBucket(OUTBOUND_GROUP_RATE, 1)
+            else:
+                bucket = TokenBucket(OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    def _try_acquire(self, chat_id, ticket):
+        """Ambil token global & chat jika tersedia. Return 0 jika berhasil, atau detik untuk menunggu."""
+        now = time.monotonic()
+        if now < self._paused_until:
+            return self._paused_until - now
+        if ticket[0] != PRIORITY_HIGH and self._waiting[PRIORITY_HIGH]:
+            return 0.05
+        chat_bucket = self._chat_bucket(chat_id)
+        wait = max(self._global.wait_time(now), chat_bucket.wait_time(now))
+        if self._chat_waiters[chat_id][0] != ticket:
+            # Masih ada request lebih dulu/lebih penting untuk chat ini
+            return max(wait, 0.01)
+        if wait:
+            return wait
+        self._global.tokens -= 1
+        chat_bucket.tokens -= 1
+        return 0
+
+    async def _acquire(self, chat_id, priority):
+        enqueued = time.monotonic()
+        self._seq += 1
+        ticket = (priority, self._seq)
+        waiters = self._chat_waiters.setdefault(chat_id, [])
+        heapq.heappush(waiters, ticket)
+        self._waiting[priority] += 1
+        try:
+            while True:
+                wait = self._try_acquire(chat_id, ticket)
+                if not wait:
+                    break
+                await asyncio.sleep(wait)
+        finally:
+            self._waiting[priority] -= 1
+            waiters.remove(ticket)
+            heapq.heapify(waiters)
+            if not waiters:
+                del self._chat_waiters[chat_id]
+        self._waits.append(time.monotonic() - enqueued)
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            # answerCallbackQuery, getUpdates, dll tidak dihitung ke batas pesan
+            return await callback(*args, **kwargs)
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            pass
+        priority = PRIORITY_LOW if rate_limit_args == PRIORITY_LOW else PRIORITY_HIGH
+        for attempt in range(OUTBOUND_MAX_RETRIES + 1):
+            await self._acquire(chat_id, priority)
+            try:
+                result = await callback(*args, **kwargs)
+                self._counters["sent"] += 1
+                return result
+            except RetryAfter as exc:
+                retry_after = exc.retry_after if isinstance(exc.retry_after, (int, float)) else exc.retry_after.total_seconds()
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after + 0.1)
+                if attempt == OUTBOUND_MAX_RETRIES:
+                    self._counters["failed"] += 1
+                    logger.error("Rate limit Telegram, %s ke chat %s gagal setelah %d percobaan", endpoint, chat_id, attempt + 1)
+                    raise
+                self._counters["retries"] += 1
+                logger.warning("Rate limit Telegram, kirim ulang %s dalam %.1f detik", endpoint, retry_after)
+
+    def stats(self):
+        """Kedalaman antrian dan latensi tunggu (ms) untuk monitoring."""
+        waits = sorted(self._waits)
+        return {
+            "depth_high": self._waiting[PRIORITY_HIGH],
+            "depth_low": self._waiting[PRIORITY_LOW],
+            "wait_p50_ms": round(waits[len(waits) // 2] * 1000, 1) if waits else 0,
+            "wait_p95_ms": round(waits[int(len(waits) * 0.95)] * 1000, 1) if waits else 0,
+            "wait_max_ms": round(waits[-1] * 1000, 1) if waits else 0,
+            **self._counters,
+        }
+
+OUTBOUND_QUEUE = OutboundQueue()
+
+# name -> [asyncio.Lock, jumlah pemakai]; lock dibuang lagi saat tidak ada yang memakai
+_resource_locks = {}
+
+@contextlib.asynccontextmanager
+async def resource_lock(name):
+    """
+    Lock asyncio per resource (contoh: "airdrop:12", "user:123") untuk operasi
+    baca-cek-tulis yang melewati beberapa await.
+    """
+    entry = _resource_locks.setdefault(name, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del _resource_locks[name]
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Update dari user berbeda diproses bersamaan, update dari user yang sama tetap berurutan
+    sehingga state ConversationHandler per user tidak balapan.
+
+    Batas max_concurrent_updates diterapkan di sini setelah lock per user didapat, bukan oleh
+    semaphore BaseUpdateProcessor (yang diambil sebelum do_process_update). Dengan begitu update
+    yang masih antre di belakang update lain dari user yang sama tidak memegang slot global,
+    dan satu user dengan banyak update lambat tidak menghambat user lain.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        # Semaphore bawaan dibuat praktis tak terbatas, pembatas sebenarnya adalah self._slots
+        super().__init__(sys.maxsize)
+        if max_concurrent_updates < 1:
+            raise ValueError("max_concurrent_updates harus >= 1")
+        self._slots = asyncio.Semaphore(max_concurrent_updates)
+
+    async def do_process_update(self, update, coroutine):
+        key = None
+        if isinstance(update, Update):
+            if update.effective_user is not None:
+                key = f"user:{update.effective_user.id}"
+            elif update.effective_chat is not None:
+                key = f"chat:{update.effective_chat.id}"
+        if key is None:
+            async with self._slots:
+                await coroutine
+            return
+        async with resource_lock(key):
+            async with self._slots:
+                await coroutine
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+def is_allowed(user_id):
+    return user_id in ALLOWED_USERS
+
+def owner_of(update: Update):
+    """Kunci partisi data airdrop milik user yang mengirim update."""
+    return str(update.effective_user.id)
+
+async def deny_access(update: Update):
+    if update.message:
+        await update.message.reply_text("Maaf, Anda tidak memiliki izin untuk menggunakan bot ini. Jangan lupa Subscribe Channel Youtube & Telegram : SHARE IT HUB")
+    elif update.callback_query:
+        await update.callback_query.answer("Maaf, Anda tidak memiliki izin.", show_alert=True)
 
 def restricted(func):
     @wraps(func)
     async def wrapped(update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs):
-        user_id = update.effective_user.id
-        if user_id != ADMIN_ID:
-            if update.message:
-                await update.message.reply_text("Maaf, Anda tidak memiliki izin untuk menggunakan bot ini. Jangan lupa Subscribe Channel Youtube & Telegram : SHARE IT HUB")
-            elif update.callback_query:
-                await update.callback_query.answer("Maaf, Anda tidak memiliki izin.", show_alert=True)
+        if not is_allowed(update.effective_user.id):
+            await deny_access(update)
             return
         return await func(update, context, *args, **kwargs)
     return wrapped
 
-def load_wallets():
-    if os.path.exists(WALLET_FILE):
-        with open(WALLET_FILE, "r") as f:
-            try:
-                return json.load(f)
-            except json.decoder.JSONDecodeError:
-                return {}
-    return {}
+async def access_guard(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Dijalankan sebelum semua handler: update dari user di luar allowlist tidak diproses."""
+    user = update.effective_user
+    if user is None or not is_allowed(user.id):
+        if user is not None:
+            await deny_access(update)
+        raise ApplicationHandlerStop
+
+def load_wallets(user_id):
+    """Ambil daftar wallet milik user (urut sesuai waktu disimpan)."""
+    records = get_db().execute(
+        "SELECT id, address, chain FROM wallets WHERE user_id = ? ORDER BY id", (user_id,)
+    ).fetchall()
+    return [{"id": wallet_id, "address": address, "chain": chain} for wallet_id, address, chain in records]
+
+def read_wallet_slice(user_id, offset: int, limit: int):
+    """Ambil satu potongan wallet milik user. Return (wallets, has_next)."""
+    records = get_db().execute(
+        "SELECT id, address, chain FROM wallets WHERE user_id = ? ORDER BY id LIMIT ? OFFSET ?", (user_id, limit + 1, offset)
+    ).fetchall()
+    wallets = [{"id": wallet_id, "address": address, "chain": chain} for wallet_id, address, chain in records[:limit]]
+    return wallets, len(records) > limit
+
+def get_wallet(user_id, wallet_id: int):
+    """Ambil satu wallet milik user berdasarkan ID, None jika tidak ada."""
+    record = get_db().execute(
+        "SELECT id, address, chain FROM wallets WHERE id = ? AND user_id = ?", (wallet_id, user_id)
+    ).fetchone()
+    if record is None:
+        return None
+    return {"id": record[0], "address": record[1], "chain": record[2]}
+
+def wallet_filter_step(user_id, wallet_id=None):
+    """
+    Data tombol filter wallet yang berputar tanpa memuat semua wallet user.
+    Return (wallet aktif atau None, ID wallet berikutnya atau None = kembali ke ALL, True jika user punya wallet).
+    """
+    current = get_wallet(user_id, wallet_id) if wallet_id is not None else None
+    record = get_db().execute(
+        "SELECT id FROM wallets WHERE user_id = ? AND id > ? ORDER BY id LIMIT 1",
+        (user_id, current["id"] if current else -1),
+    ).fetchone()
+    next_id = record[0] if record else None
+    return current, next_id, current is not None or next_id is not None
+
+def wallet_keys(user_id):
+    """Hash set wallet milik user {(address, chain) ternormalisasi: ID wallet}."""
+    db = get_db()
+    _sync_cache(db)
+    keys = _airdrop_cache["wallets"].get(user_id)
+    if keys is None:
+        keys = {}
+        for wallet in load_wallets(user_id):
+            keys.setdefault(wallet_key(wallet["address"], wallet["chain"]), wallet["id"])
+        _airdrop_cache["wallets"][user_id] = keys
+    return keys
 
 def save_wallet(user_id, address, chain):
-    wallets = load_wallets()
+    """
+    Simpan wallet milik user. Address yang sudah tersimpan di chain yang sama ditolak.
+    Return (ID wallet, True jika baru disimpan / False jika duplikat).
+    """
     address = address.strip()
     chain = chain.upper()
-    if user_id not in wallets:
-        wallets[user_id] = []
-    wallets[user_id].append({"address": address, "chain": chain})
-    with open(WALLET_FILE, "w") as f:
-        json.dump(wallets, f, indent=4)
-
-def delete_wallet_by_index(user_id, index: int):
-    wallets = load_wallets()
-    user_wallets = wallets.get(user_id, [])
-    if 0 <= index < len(user_wallets):
-        removed = user_wallets.pop(index)
-        wallets[user_id] = user_wallets
-        with open(WALLET_FILE, "w") as f:
-            json.dump(wallets, f, indent=4)
-        return removed
-    return None
+    keys = wallet_keys(user_id)
+    key = wallet_key(address, chain)
+    if key in keys:
+        return keys[key], False
+    db = get_db()
+    with db:
+        cur = db.execute("INSERT INTO wallets (user_id, address, chain) VALUES (?, ?, ?)", (user_id, address, chain))
+    keys[key] = cur.lastrowid
+    compact_storage()
+    return cur.lastrowid, True
+
+def remove_wallet(user_id, wallet_id: int):
+    """Hapus wallet milik user. Return wallet yang dihapus, None jika tidak ada."""
+    keys = wallet_keys(user_id)
+    removed = get_wallet(user_id, wallet_id)
+    if removed is None:
+        return None
+    db = get_db()
+    with db:
+        db.execute("DELETE FROM wallets WHERE id = ?", (wallet_id,))
+    key = wallet_key(removed["address"], removed["chain"])
+    if keys.get(key) == wallet_id:
+        del keys[key]
+    compact_storage()
+    return removed
+
+def dedupe_storage(owner=None):
+    """
+    Hapus duplikat yang sudah terlanjur tersimpan (milik owner, atau semua owner jika None):
+    airdrop dengan link & wallet sama dan wallet dengan address & chain sama.
+    Yang disimpan pertama (ID terkecil) dipertahankan, reminder airdrop duplikat ikut dihapus.
+    Return (list (owner, ID airdrop yang dihapus), jumlah wallet yang dihapus).
+    """
+    db = get_db()
+    where, params = ("WHERE owner = ?", (owner,)) if owner is not None else ("", ())
+    kept = set()
+    removed_airdrops = []
+    for airdrop_id, row_owner, link, wallet in db.execute(f"SELECT id, owner, link, wallet FROM airdrops {where} ORDER BY id", params):
+        key = (row_owner, normalize_link(link), normalize_address(wallet))
+        if key in kept:
+            removed_airdrops.append((row_owner, airdrop_id))
+        else:
+            kept.add(key)
+    where, params = ("WHERE user_id = ?", (owner,)) if owner is not None else ("", ())
+    kept = set()
+    removed_wallets = []
+    for wallet_id, user_id, address, chain in db.execute(f"SELECT id, user_id, address, chain FROM wallets {where} ORDER BY id", params):
+        key = (user_id, *wallet_key(address, chain))
+        if key in kept:
+            removed_wallets.append(wallet_id)
+        else:
+            kept.add(key)
+    if removed_airdrops or removed_wallets:
+        with db:
+            db.executemany("DELETE FROM airdrops WHERE id = ?", [(i,) for _, i in removed_airdrops])
+            db.executemany("DELETE FROM reminders WHERE airdrop_id = ?", [(i,) for _, i in removed_airdrops])
+            db.executemany("DELETE FROM wallets WHERE id = ?", [(i,) for i in removed_wallets])
+        for cache in ("owners", "index", "links", "wallets", "summary"):
+            _airdrop_cache[cache].clear()
+        for row_owner in {o for o, _ in removed_airdrops}:
+            _bump_generation(row_owner)
+        compact_storage(force=True)
+    return removed_airdrops, len(removed_wallets)
+
+# Keyboard utama dibuat sekali dan dipakai bersama (objek Telegram tidak bisa diubah setelah dibuat)
+MAIN_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✨ Add Airdrop", callback_data="add_airdrop"),
+     InlineKeyboardButton("💳 Add Wallet", callback_data="add_wallet")],
+    [InlineKeyboardButton("🗑 Delete Wallet", callback_data="delete_wallet"),
+     InlineKeyboardButton("📋 List Wallet Address", callback_data="list_wallet")],
+    [InlineKeyboardButton("📊 List Airdrop Saved", callback_data="list_airdrop"),
+     InlineKeyboardButton("⏰ Reminder List", callback_data="reminder_lst")],
+    [InlineKeyboardButton("⚙️ Reminder Sett", callback_data="reminder_sett"),
+     InlineKeyboardButton("⏹ Stop Reminder", callback_data="stop_reminder")],
+    [InlineKeyboardButton("📥 Download Data", callback_data="download_data"),
+     InlineKeyboardButton("🔍 Search Airdrop", callback_data="search_airdrop")],
+    [InlineKeyboardButton("🗑 Delete Airdrop", callback_data="delete_airdrop"),
+     InlineKeyboardButton("✅ Finish Airdrop", callback_data="finish_airdrop")],
+    [InlineKeyboardButton("🗄 Archive", callback_data="archive_list"),
+     InlineKeyboardButton("📈 Summary", callback_data="summary")],
+])
 
 def get_main_keyboard():
-    keyboard = [
-        [InlineKeyboardButton("✨ Add Airdrop", callback_data="add_airdrop"),
-         InlineKeyboardButton("💳 Add Wallet", callback_data="add_wallet")],
-        [InlineKeyboardButton("🗑 Delete Wallet", callback_data="delete_wallet"),
-         InlineKeyboardButton("📋 List Wallet Address", callback_data="list_wallet")],
-        [InlineKeyboardButton("📊 List Airdrop Saved", callback_data="list_airdrop"),
-         InlineKeyboardButton("⏰ Reminder List", callback_data="reminder_lst")],
-        [InlineKeyboardButton("⚙️ Reminder Sett", callback_data="reminder_sett"),
-         InlineKeyboardButton("⏹ Stop Reminder", callback_data="stop_reminder")],
-        [InlineKeyboardButton("📥 Download Data", callback_data="download_data")],
-        [InlineKeyboardButton("🗑 Delete Airdrop", callback_data="delete_airdrop")],
-    ]
+    return MAIN_KEYBOARD
+
+# Kode pendek jenis airdrop untuk callback data filter
+AIRDROP_TYPE_CODES = {"T": "TESTNET", "A": "AIRDROP", "N": "NODE", "O": "OTHER"}
+
+def picker_data(picker, page, type_code="", wallet_id=None):
+    """Callback data navigasi keyboard pilihan, contoh: pg:da:2:N:15 (maks 64 byte)."""
+    return f"pg:{picker}:{page}:{type_code}:{'' if wallet_id is None else wallet_id}"
+
+def parse_picker_data(data):
+    _, picker, page, type_code, wallet_id = data.split(":")
+    return picker, int(page), type_code, int(wallet_id) if wallet_id else None
+
+def paged_keyboard(buttons, picker, page, has_next, type_code="", wallet_id=None, wallet_filter=None):
+    """
+    Keyboard pilihan yang dipaging: satu baris per tombol item (InlineKeyboardButton),
+    baris navigasi, dan (jika wallet_filter diberikan, hasil wallet_filter_step) baris filter jenis & wallet.
+    """
+    keyboard = [[button] for button in buttons]
+    if not buttons:
+        keyboard.append([InlineKeyboardButton("(kosong)", callback_data=picker_data(picker, 0, type_code, wallet_id))])
+    nav = []
+    if page > 0:
+        nav.append(InlineKeyboardButton("⬅️", callback_data=picker_data(picker, page - 1, type_code, wallet_id)))
+    nav.append(InlineKeyboardButton(f"Hal {page + 1}", callback_data=picker_data(picker, page, type_code, wallet_id)))
+    if has_next:
+        nav.append(InlineKeyboardButton("➡️", callback_data=picker_data(picker, page + 1, type_code, wallet_id)))
+    keyboard.append(nav)
+    if wallet_filter is not None:
+        # Filter jenis: ALL, TESTNET, AIRDROP, NODE, OTHER (yang aktif diberi tanda ✅)
+        type_row = [InlineKeyboardButton(("✅ " if not type_code else "") + "ALL", callback_data=picker_data(picker, 0, "", wallet_id))]
+        for code, name in AIRDROP_TYPE_CODES.items():
+            label = ("✅ " if code == type_code else "") + name
+            type_row.append(InlineKeyboardButton(label, callback_data=picker_data(picker, 0, code, wallet_id)))
+        keyboard.append(type_row)
+        # Filter wallet: tombol berputar ALL -> wallet 1 -> wallet 2 -> ... -> ALL
+        current, next_id, has_wallets = wallet_filter
+        if has_wallets:
+            if current is not None:
+                label = f"💼 {current['address'][:10]}… ({current['chain']})"
+            else:
+                label = "💼 Semua Wallet"
+            keyboard.append([InlineKeyboardButton(label, callback_data=picker_data(picker, 0, type_code, next_id))])
     return InlineKeyboardMarkup(keyboard)
 
+def _delete_airdrop_button(airdrop_id, row):
+    return InlineKeyboardButton(f"{airdrop_id}. {row[1]} - {str(row[0])[:20]}...", callback_data=f"delairdrop_{airdrop_id}")
+
+def _finish_airdrop_button(airdrop_id, row):
+    return InlineKeyboardButton(f"{airdrop_id}. {row[1]} - {str(row[0])[:20]}...", callback_data=f"finairdrop_{airdrop_id}")
+
+def _reminder_airdrop_button(airdrop_id, row):
+    return InlineKeyboardButton(f"ID {airdrop_id}: {row[1]}", callback_data=f"rem_sett_choice_{airdrop_id}")
+
+# picker -> (judul pesan, pembuat tombol item). Tombol disimpan di cache render per picker.
+AIRDROP_PICKERS = {
+    "da": ("Pilih airdrop yang ingin DIHAPUS:", _delete_airdrop_button),
+    "fa": ("Pilih airdrop yang sudah SELESAI (dipindah ke archive):", _finish_airdrop_button),
+    "rs": ("Pilih data Airdrop yang ingin di-reminder:", _reminder_airdrop_button),
+}
+WALLET_PICKERS = {
+    "cw": ("PILIH WALLET ADDRESS UNTUK AIRDROP INI:", "wallet_", ""),
+    "dw": ("Pilih wallet yang ingin DIHAPUS:", "delwallet_", "❌ "),
+}
+
+async def _send_picker(update: Update, text, reply_markup, edit):
+    query = update.callback_query
+    if edit:
+        await query.edit_message_text(text, reply_markup=reply_markup)
+    else:
+        message = query.message if query else update.message
+        await message.reply_text(text, reply_markup=reply_markup)
+
+async def show_airdrop_picker(update: Update, picker, page=0, type_code="", wallet_id=None, edit=False):
+    """Tampilkan satu halaman keyboard pilihan airdrop, hanya baris halaman itu yang dibaca."""
+    title, make_button = AIRDROP_PICKERS[picker]
+    owner = owner_of(update)
+    records, has_next = await run_storage(
+        read_airdrop_slice, owner, page * PICKER_PAGE_SIZE, PICKER_PAGE_SIZE, AIRDROP_TYPE_CODES.get(type_code), wallet_id
+    )
+    wallet_filter = await run_storage(wallet_filter_step, owner, wallet_id)
+    buttons = [cached_render(picker, airdrop_id, row, make_button) for airdrop_id, row in records if len(row) >= 5]
+    reply_markup = paged_keyboard(buttons, picker, page, has_next, type_code, wallet_id, wallet_filter)
+    await _send_picker(update, title, reply_markup, edit)
+
+async def show_wallet_picker(update: Update, picker, page=0, edit=False):
+    """Tampilkan satu halaman keyboard pilihan wallet milik user."""
+    title, item_prefix, label_prefix = WALLET_PICKERS[picker]
+    wallets, has_next = await run_storage(
+        read_wallet_slice, str(update.effective_user.id), page * PICKER_PAGE_SIZE, PICKER_PAGE_SIZE
+    )
+    buttons = [InlineKeyboardButton(f"{label_prefix}{w['address']} ({w['chain']})", callback_data=f"{item_prefix}{w['id']}") for w in wallets]
+    await _send_picker(update, title, paged_keyboard(buttons, picker, page, has_next), edit)
+
+async def show_reminder_picker(update: Update, context: ContextTypes.DEFAULT_TYPE, page=0, edit=False):
+    """Tampilkan satu halaman keyboard reminder yang sedang berjalan milik chat ini."""
+    reminders = chat_reminders(update.effective_user.id)
+    visible = reminders[page * PICKER_PAGE_SIZE:(page + 1) * PICKER_PAGE_SIZE]
+    buttons = []
+    for reminder in visible:
+        airdrop_id = reminder["airdrop_id"]
+        buttons.append(InlineKeyboardButton(f"Stop Reminder Data Airdrop ID {airdrop_id}", callback_data=f"stoprem_{airdrop_id}"))
+    has_next = len(reminders) > (page + 1) * PICKER_PAGE_SIZE
+    await _send_picker(update, "Pilih reminder yang ingin dihentikan:", paged_keyboard(buttons, "sr", page, has_next), edit)
+
+# picker -> state conversation yang aktif saat keyboard tersebut ditampilkan
+PICKER_STATES = {
+    "da": CHOOSE_AIRDROP_DELETE,
+    "fa": CHOOSE_AIRDROP_FINISH,
+    "rs": REMINDER_SETT_CHOOSE,
+    "cw": CHOOSE_WALLET,
+    "dw": CHOOSE_WALLET_DELETE,
+    "sr": STOP_REMINDER_CHOOSE,
+}
+
+async def picker_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Navigasi/filter keyboard pilihan: edit keyboard yang sama ke halaman yang diminta."""
+    query = update.callback_query
+    await query.answer()
+    picker, page, type_code, wallet_id = parse_picker_data(query.data)
+    try:
+        if picker in AIRDROP_PICKERS:
+            await show_airdrop_picker(update, picker, page, type_code, wallet_id, edit=True)
+        elif picker in WALLET_PICKERS:
+            await show_wallet_picker(update, picker, page, edit=True)
+        else:
+            await show_reminder_picker(update, context, page, edit=True)
+    except Exception as e:
+        logger.error(e)
+    return PICKER_STATES[picker]
+
 @restricted
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("This bot was created by: SHARE IT HUB🚀", reply_markup=get_main_keyboard())
@@ -147,7 +1572,10 @@ async def choose_chain(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     if query.data == "wallet_type_evm":
         chain = "EVM"
-        save_wallet(str(query.from_user.id), context.user_data["wallet_address"], chain)
+        _, created = await run_storage(save_wallet, str(query.from_user.id), context.user_data["wallet_address"], chain)
+        if not created:
+            await query.message.reply_text(f"⚠️ WALLET {context.user_data['wallet_address']} (EVM) SUDAH TERSIMPAN.", reply_markup=get_main_keyboard())
+            return ConversationHandler.END
         await query.message.reply_text(f"✅ WALLET {context.user_data['wallet_address']} (EVM) BERHASIL DISIMPAN!", reply_markup=get_main_keyboard())
         return ConversationHandler.END
     await query.message.reply_text("Silakan masukkan nama CHAIN untuk wallet Anda:")
@@ -155,7 +1583,10 @@ async def choose_chain(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def save_other_chain(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chain = update.message.text.strip()
-    save_wallet(str(update.message.from_user.id), context.user_data["wallet_address"], chain)
+    _, created = await run_storage(save_wallet, str(update.message.from_user.id), context.user_data["wallet_address"], chain)
+    if not created:
+        await update.message.reply_text(f"⚠️ WALLET {context.user_data['wallet_address'].upper()} ({chain.upper()}) SUDAH TERSIMPAN.", reply_markup=get_main_keyboard())
+        return ConversationHandler.END
     await update.message.reply_text(f"✅ WALLET {context.user_data['wallet_address'].upper()} ({chain.upper()}) BERHASIL DISIMPAN!", reply_markup=get_main_keyboard())
     return ConversationHandler.END
 
@@ -188,15 +1619,11 @@ async def choose_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
     context.user_data["airdrop_type"] = query.data.replace("airdrop_type_", "").upper()
     user_id = str(query.from_user.id)
-    wallets = load_wallets().get(user_id, [])
+    wallets, _ = await run_storage(read_wallet_slice, user_id, 0, 1)
     if not wallets:
         await query.message.reply_text("⚠️ ANDA BELUM MEMILIKI WALLET. SILAKAN TAMBAHKAN WALLET TERLEBIH DAHULU.", reply_markup=get_main_keyboard())
         return ConversationHandler.END
-    keyboard = [
-        [InlineKeyboardButton(f"{w['address']} ({w['chain']})", callback_data=f"wallet_{i}")]
-        for i, w in enumerate(wallets)
-    ]
-    await query.message.reply_text("PILIH WALLET ADDRESS UNTUK AIRDROP INI:", reply_markup=InlineKeyboardMarkup(keyboard))
+    await show_wallet_picker(update, "cw")
     return CHOOSE_WALLET
 
 async def save_airdrop(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -206,20 +1633,16 @@ async def save_airdrop(update: Update, context: ContextTypes.DEFAULT_TYPE):
     airdrop_title = context.user_data["airdrop_title"]
     airdrop_type = context.user_data["airdrop_type"]
     user_id = str(query.from_user.id)
-    wallets = load_wallets().get(user_id, [])
-    index = int(query.data.replace("wallet_", ""))
-    wallet_address = wallets[index]["address"] if index < len(wallets) else "TIDAK DITEMUKAN"
+    wallet = await run_storage(get_wallet, user_id, int(query.data.replace("wallet_", "")))
+    wallet_address = wallet["address"] if wallet else "TIDAK DITEMUKAN"
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     new_row = [airdrop_link, airdrop_title, airdrop_type, wallet_address, timestamp]
     
     # Simpan data ke file Excel dan format baris yang baru ditambahkan
-    wb = get_workbook()
-    ws = wb.active
-    ws.append(new_row)
-    last_row = ws.max_row
-    for col in range(1, 6):
-        ws.cell(row=last_row, column=col).alignment = Alignment(horizontal="center", vertical="center")
-    save_workbook(wb)
+    airdrop_id, created = await run_storage(append_airdrop_row, user_id, new_row)
+    if not created:
+        await query.message.reply_text(f"⚠️ Link airdrop ini sudah tersimpan untuk wallet tersebut (ID {airdrop_id}).", reply_markup=get_main_keyboard())
+        return ConversationHandler.END
     
     await query.message.reply_text("✅ AIRDROP BERHASIL DISIMPAN KE FILE EXCEL!", reply_markup=get_main_keyboard())
     return ConversationHandler.END
@@ -228,28 +1651,24 @@ async def delete_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     user_id = str(query.from_user.id)
-    wallets = load_wallets().get(user_id, [])
+    wallets, _ = await run_storage(read_wallet_slice, user_id, 0, 1)
     if not wallets:
         await query.message.reply_text("⚠️ TIDAK ADA WALLET YANG DITEMUKAN.", reply_markup=get_main_keyboard())
         return ConversationHandler.END
-    keyboard = [
-        [InlineKeyboardButton(f"❌ {w['address']} ({w['chain']})", callback_data=f"delwallet_{i}")]
-        for i, w in enumerate(wallets)
-    ]
-    await query.message.reply_text("Pilih wallet yang ingin DIHAPUS:", reply_markup=InlineKeyboardMarkup(keyboard))
+    await show_wallet_picker(update, "dw")
     return CHOOSE_WALLET_DELETE
 
 async def process_delete_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     user_id = str(query.from_user.id)
-    index_str = query.data.replace("delwallet_", "")
+    wallet_id_str = query.data.replace("delwallet_", "")
     try:
-        index = int(index_str)
+        wallet_id = int(wallet_id_str)
     except ValueError:
         await query.message.reply_text("Data tidak valid.", reply_markup=get_main_keyboard())
         return ConversationHandler.END
-    removed = delete_wallet_by_index(user_id, index)
+    removed = await run_storage(remove_wallet, user_id, wallet_id)
     if removed:
         await query.message.reply_text(f"✅ Wallet {removed['address']} ({removed['chain']}) BERHASIL DIHAPUS!", reply_markup=get_main_keyboard())
     else:
@@ -260,7 +1679,7 @@ async def list_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     user_id = str(query.from_user.id)
-    wallets = load_wallets().get(user_id, [])
+    wallets = await run_storage(load_wallets, user_id)
     if not wallets:
         await query.message.reply_text("⚠️ Anda belum menyimpan wallet.", reply_markup=get_main_keyboard())
     else:
@@ -271,51 +1690,149 @@ async def list_wallet(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await query.message.reply_text(text, parse_mode="Markdown", reply_markup=get_main_keyboard())
     return ConversationHandler.END
 
+def _clip(value, limit=MAX_FIELD_LENGTH):
+    value = str(value)
+    return value if len(value) <= limit else value[:limit - 3] + "..."
+
+def format_airdrop_entry(airdrop_id, row):
+    return (
+        f"🎉 *Airdrop Entry #{airdrop_id}*\n"
+        f"🔗 *Link:* `{_clip(row[0])}`\n"
+        f"📝 *Judul:* **{_clip(row[1])}**\n"
+        f"⚙️ *Jenis:* **{_clip(row[2])}**\n"
+        f"💼 *Wallet:* `{_clip(row[3])}`\n"
+        f"⏰ *Time:* {row[4]}\n"
+        "----------------------------------\n\n"
+    )
+
+def render_airdrop_page(records, has_prev, has_next, title="📊 *List Airdrop Saved:*", nav_prefix="lstair"):
+    """
+    Susun teks & keyboard satu halaman. Entry yang membuat pesan melewati
+    MAX_MESSAGE_LENGTH dipindah ke halaman berikutnya.
+    """
+    text = f"{title}\n\n"
+    shown = []
+    for airdrop_id, row in records:
+        if len(row) < 5:
+            continue
+        entry = cached_render("entry", airdrop_id, row, format_airdrop_entry)
+        if shown and len(text) + len(entry) > MAX_MESSAGE_LENGTH:
+            has_next = True
+            break
+        text += entry
+        shown.append(airdrop_id)
+    nav = []
+    if shown and has_prev:
+        nav.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"{nav_prefix}_p_{shown[0]}"))
+    if shown and has_next:
+        nav.append(InlineKeyboardButton("Next ➡️", callback_data=f"{nav_prefix}_n_{shown[-1]}"))
+    if not nav:
+        return text, MAIN_KEYBOARD
+    return text, InlineKeyboardMarkup((nav, *MAIN_KEYBOARD.inline_keyboard))
+
 async def list_airdrop(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     try:
-        wb = get_workbook()
-        ws = wb.active
-        data = list(ws.values)
-        if len(data) < 2:
+        records, has_prev, has_next = await run_storage(read_airdrop_page, owner_of(update), 0)
+        if not records:
             await query.message.reply_text("⚠️ Tidak ada data airdrop yang tersimpan.", reply_markup=get_main_keyboard())
             return ConversationHandler.END
-        text = "📊 *List Airdrop Saved:*\n\n"
-        for idx, row in enumerate(data[1:], start=2):
-            if len(row) >= 5:
-                text += (
-                    f"🎉 *Airdrop Entry #{idx}*\n"
-                    f"🔗 *Link:* `{row[0]}`\n"
-                    f"📝 *Judul:* **{row[1]}**\n"
-                    f"⚙️ *Jenis:* **{row[2]}**\n"
-                    f"💼 *Wallet:* `{row[3]}`\n"
-                    f"⏰ *Time:* {row[4]}\n"
-                    "----------------------------------\n\n"
-                )
-        await query.message.reply_text(text, parse_mode="Markdown", reply_markup=get_main_keyboard())
+        text, reply_markup = render_airdrop_page(records, has_prev, has_next)
+        await query.message.reply_text(text, parse_mode="Markdown", reply_markup=reply_markup)
     except Exception as e:
         logger.error(e)
         await query.message.reply_text("⚠️ Terjadi kesalahan saat mengambil data.", reply_markup=get_main_keyboard())
     return ConversationHandler.END
 
+async def list_airdrop_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Tombol Prev/Next: edit pesan list yang sama dengan halaman sebelumnya/berikutnya."""
+    query = update.callback_query
+    await query.answer()
+    _, direction, cursor = query.data.split("_")
+    try:
+        owner = owner_of(update)
+        records, has_prev, has_next = await run_storage(read_airdrop_page, owner, int(cursor), backward=direction == "p")
+        if not records:
+            # Data di sekitar cursor sudah dihapus, kembali ke halaman pertama
+            records, has_prev, has_next = await run_storage(read_airdrop_page, owner, 0)
+        if not records:
+            await query.edit_message_text("⚠️ Tidak ada data airdrop yang tersimpan.", reply_markup=get_main_keyboard())
+            return
+        text, reply_markup = render_airdrop_page(records, has_prev, has_next)
+        await query.edit_message_text(text, parse_mode="Markdown", reply_markup=reply_markup)
+    except Exception as e:
+        logger.error(e)
+        await query.message.reply_text("⚠️ Terjadi kesalahan saat mengambil data.", reply_markup=get_main_keyboard())
+
+SEARCH_USAGE = "Format: /search <kata kunci> (judul, link, jenis atau wallet address)"
+
+async def send_search_results(update: Update, context: ContextTypes.DEFAULT_TYPE, query_text):
+    """Jalankan pencarian lalu kirim halaman pertama hasilnya."""
+    message = update.message if update.message else update.callback_query.message
+    terms = sorted(tokenize(query_text))
+    if not terms:
+        await message.reply_text(SEARCH_USAGE, reply_markup=get_main_keyboard())
+        return
+    context.user_data["search_terms"] = terms
+    try:
+        records, has_prev, has_next = await run_storage(search_airdrop_page, owner_of(update), terms, 0)
+        if not records:
+            await message.reply_text(f"🔍 Tidak ada airdrop yang cocok dengan \"{_clip(query_text, 50)}\".", reply_markup=get_main_keyboard())
+            return
+        text, reply_markup = render_airdrop_page(records, has_prev, has_next, "🔍 *Hasil Pencarian:*", "srch")
+        await message.reply_text(text, parse_mode="Markdown", reply_markup=reply_markup)
+    except Exception as e:
+        logger.error(e)
+        await message.reply_text("⚠️ Terjadi kesalahan saat mencari data.", reply_markup=get_main_keyboard())
+
+async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/search <kata kunci>"""
+    await send_search_results(update, context, " ".join(context.args or []))
+
+async def search_airdrop(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    await query.message.reply_text("🔍 Masukkan kata kunci pencarian (judul, link, jenis atau wallet address):")
+    return SEARCH_INPUT
+
+async def receive_search_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    await send_search_results(update, context, update.message.text)
+    return ConversationHandler.END
+
+async def search_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Tombol Prev/Next hasil pencarian: edit pesan yang sama."""
+    query = update.callback_query
+    await query.answer()
+    _, direction, cursor = query.data.split("_")
+    terms = context.user_data.get("search_terms")
+    if not terms:
+        await query.message.reply_text(SEARCH_USAGE, reply_markup=get_main_keyboard())
+        return
+    try:
+        records, has_prev, has_next = await run_storage(
+            search_airdrop_page, owner_of(update), terms, int(cursor), backward=direction == "p"
+        )
+        if not records:
+            records, has_prev, has_next = await run_storage(search_airdrop_page, owner_of(update), terms, 0)
+        if not records:
+            await query.edit_message_text("🔍 Tidak ada airdrop yang cocok.", reply_markup=get_main_keyboard())
+            return
+        text, reply_markup = render_airdrop_page(records, has_prev, has_next, "🔍 *Hasil Pencarian:*", "srch")
+        await query.edit_message_text(text, parse_mode="Markdown", reply_markup=reply_markup)
+    except Exception as e:
+        logger.error(e)
+        await query.message.reply_text("⚠️ Terjadi kesalahan saat mencari data.", reply_markup=get_main_keyboard())
+
 async def delete_airdrop(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     try:
-        wb = get_workbook()
-        ws = wb.active
-        data = list(ws.values)
-        if len(data) < 2:
+        records, _ = await run_storage(read_airdrop_slice, owner_of(update), 0, 1)
+        if not records:
             await query.message.reply_text("⚠️ Tidak ada data airdrop yang tersimpan.", reply_markup=get_main_keyboard())
             return ConversationHandler.END
-        keyboard = []
-        for row_number, row in enumerate(data[1:], start=2):
-            if len(row) >= 5:
-                button_text = f"{row_number}. {row[1]} - {str(row[0])[:20]}..."
-                keyboard.append([InlineKeyboardButton(button_text, callback_data=f"delairdrop_{row_number}")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.message.reply_text("Pilih airdrop yang ingin DIHAPUS:", reply_markup=reply_markup)
+        await show_airdrop_picker(update, "da")
         return CHOOSE_AIRDROP_DELETE
     except Exception as e:
         logger.error(e)
@@ -326,45 +1843,299 @@ async def process_delete_airdrop(update: Update, context: ContextTypes.DEFAULT_T
     query = update.callback_query
     await query.answer()
     try:
-        row_number = int(query.data.replace("delairdrop_", ""))
-        wb = get_workbook()
-        ws = wb.active
-        max_row = ws.max_row
-        if row_number > 1 and row_number <= max_row:
-            ws.delete_rows(row_number, 1)
-            save_workbook(wb)
+        airdrop_id = int(query.data.replace("delairdrop_", ""))
+        async with resource_lock(f"airdrop:{airdrop_id}"):
+            removed = await run_storage(remove_airdrop, owner_of(update), airdrop_id)
+            if removed:
+                # Hentikan reminder yang menunjuk ke airdrop yang sudah dihapus
+                cancel_airdrop_reminders(airdrop_id)
+        if removed:
             await query.message.reply_text("✅ Airdrop BERHASIL DIHAPUS!", reply_markup=get_main_keyboard())
         else:
-            await query.message.reply_text("⚠️ Baris tidak valid.", reply_markup=get_main_keyboard())
+            await query.message.reply_text("⚠️ Airdrop tidak ditemukan.", reply_markup=get_main_keyboard())
     except Exception as e:
         logger.error(e)
         await query.message.reply_text("⚠️ Gagal menghapus airdrop.", reply_markup=get_main_keyboard())
     return ConversationHandler.END
 
-async def reminder_airdrop_job(context: ContextTypes.DEFAULT_TYPE):
-    job_data = context.job.data
-    chat_id = job_data["chat_id"]
-    row_number = job_data["row_number"]
+async def finish_airdrop(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
     try:
-        wb = get_workbook()
-        ws = wb.active
-        max_row = ws.max_row
-        if row_number >= 2 and row_number <= max_row:
-            row = list(ws.values)[row_number - 1]
-            text = (
-                f"📢 *Reminder Airdrop*\n\n"
-                f"🔗 *Link:* `{row[0]}`\n"
-                f"📝 *Judul:* **{row[1]}**\n"
-                f"⚙️ *Jenis:* **{row[2]}**\n"
-                f"💼 *Wallet:* `{row[3]}`\n"
-                f"⏰ *Time:* {row[4]}\n"
+        records, _ = await run_storage(read_airdrop_slice, owner_of(update), 0, 1)
+        if not records:
+            await query.message.reply_text("⚠️ Tidak ada data airdrop yang tersimpan.", reply_markup=get_main_keyboard())
+            return ConversationHandler.END
+        await show_airdrop_picker(update, "fa")
+        return CHOOSE_AIRDROP_FINISH
+    except Exception as e:
+        logger.error(e)
+        await query.message.reply_text("⚠️ Terjadi kesalahan saat mengambil data.", reply_markup=get_main_keyboard())
+        return ConversationHandler.END
+
+async def process_finish_airdrop(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    try:
+        airdrop_id = int(query.data.replace("finairdrop_", ""))
+        async with resource_lock(f"airdrop:{airdrop_id}"):
+            archived = await run_storage(archive_airdrop, owner_of(update), airdrop_id)
+            if archived:
+                cancel_airdrop_reminders(airdrop_id)
+        if archived:
+            await query.message.reply_text(
+                f"✅ Airdrop ID {airdrop_id} dipindah ke archive. Kembalikan dengan /restore {airdrop_id}", reply_markup=get_main_keyboard()
             )
         else:
-            text = "⚠️ Data airdrop tidak ditemukan."
+            await query.message.reply_text("⚠️ Airdrop tidak ditemukan.", reply_markup=get_main_keyboard())
     except Exception as e:
         logger.error(e)
-        text = "⚠️ Terjadi kesalahan saat mengambil data airdrop."
-    await context.bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown")
+        await query.message.reply_text("⚠️ Gagal memindahkan airdrop ke archive.", reply_markup=get_main_keyboard())
+    return ConversationHandler.END
+
+async def summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Dashboard ringkasan: total per jenis, per wallet, minggu & bulan ini."""
+    query = update.callback_query
+    await query.answer()
+    try:
+        data = await run_storage(airdrop_summary, owner_of(update))
+    except Exception as e:
+        logger.error(e)
+        await query.message.reply_text("⚠️ Terjadi kesalahan saat mengambil data.", reply_markup=get_main_keyboard())
+        return
+    text = (
+        "📈 *Summary Airdrop*\n\n"
+        f"Total: *{data['total']}*\n"
+        f"Ditambahkan minggu ini: *{data['this_week']}*\n"
+        f"Ditambahkan bulan ini: *{data['this_month']}*\n\n"
+        "*Per jenis:*\n"
+    )
+    for name in AIRDROP_TYPE_CODES.values():
+        text += f"• {name}: {data['type'].get(name, 0)}\n"
+    others = sum(n for name, n in data["type"].items() if name not in AIRDROP_TYPE_CODES.values())
+    if others:
+        text += f"• (lainnya): {others}\n"
+    text += "\n*Per wallet:*\n"
+    for wallet, n in data["wallet"][:PICKER_PAGE_SIZE]:
+        text += f"• `{_clip(wallet, 20)}`: {n}\n"
+    if len(data["wallet"]) > PICKER_PAGE_SIZE:
+        text += f"• ... dan {len(data['wallet']) - PICKER_PAGE_SIZE} wallet lainnya\n"
+    await query.message.reply_text(text, parse_mode="Markdown", reply_markup=get_main_keyboard())
+
+ARCHIVE_TITLE = "🗄 *Archive Airdrop:* (/restore <ID> untuk mengembalikan)"
+
+async def archive_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Tombol Archive / perintah /archive: halaman pertama airdrop yang sudah diarchive."""
+    message = update.callback_query.message if update.callback_query else update.message
+    if update.callback_query:
+        await update.callback_query.answer()
+    try:
+        records, has_prev, has_next = await run_storage(read_airdrop_page, owner_of(update), 0, archived=True)
+        if not records:
+            await message.reply_text("🗄 Archive masih kosong.", reply_markup=get_main_keyboard())
+            return
+        text, reply_markup = render_airdrop_page(records, has_prev, has_next, ARCHIVE_TITLE, "arc")
+        await message.reply_text(text, parse_mode="Markdown", reply_markup=reply_markup)
+    except Exception as e:
+        logger.error(e)
+        await message.reply_text("⚠️ Terjadi kesalahan saat mengambil data.", reply_markup=get_main_keyboard())
+
+async def archive_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Tombol Prev/Next archive: edit pesan yang sama."""
+    query = update.callback_query
+    await query.answer()
+    _, direction, cursor = query.data.split("_")
+    try:
+        owner = owner_of(update)
+        records, has_prev, has_next = await run_storage(
+            read_airdrop_page, owner, int(cursor), backward=direction == "p", archived=True
+        )
+        if not records:
+            records, has_prev, has_next = await run_storage(read_airdrop_page, owner, 0, archived=True)
+        if not records:
+            await query.edit_message_text("🗄 Archive masih kosong.", reply_markup=get_main_keyboard())
+            return
+        text, reply_markup = render_airdrop_page(records, has_prev, has_next, ARCHIVE_TITLE, "arc")
+        await query.edit_message_text(text, parse_mode="Markdown", reply_markup=reply_markup)
+    except Exception as e:
+        logger.error(e)
+        await query.message.reply_text("⚠️ Terjadi kesalahan saat mengambil data.", reply_markup=get_main_keyboard())
+
+async def restore_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/restore <ID>: kembalikan airdrop dari archive."""
+    try:
+        airdrop_id = int((context.args or [""])[0])
+    except ValueError:
+        await update.message.reply_text("Format: /restore <ID airdrop>")
+        return
+    try:
+        result = await run_storage(restore_airdrop, owner_of(update), airdrop_id)
+    except Exception as e:
+        logger.error(e)
+        await update.message.reply_text("⚠️ Gagal mengembalikan airdrop.", reply_markup=get_main_keyboard())
+        return
+    replies = {
+        "restored": f"✅ Airdrop ID {airdrop_id} dikembalikan dari archive.",
+        "missing": "⚠️ Airdrop tidak ditemukan di archive.",
+        "duplicate": "⚠️ Link airdrop ini sudah tersimpan lagi untuk wallet yang sama.",
+    }
+    await update.message.reply_text(replies[result], reply_markup=get_main_keyboard())
+
+async def archive_job(context: ContextTypes.DEFAULT_TYPE):
+    """Job berkala: pindahkan airdrop yang lebih tua dari ARCHIVE_AFTER_DAYS ke archive."""
+    try:
+        archived = await run_storage(archive_expired)
+    except Exception as e:
+        logger.error(e)
+        return
+    for _, airdrop_id in archived:
+        cancel_airdrop_reminders(airdrop_id)
+    if archived:
+        logger.info("%d airdrop lama dipindah ke archive.", len(archived))
+
+# Reminder aktif: (chat_id, airdrop_id) -> {"chat_id", "airdrop_id", "interval", "next_run"}
+_reminders = {}
+# Min-heap (next_run, chat_id, airdrop_id). Entry yang sudah basi (reminder dihentikan
+# atau dijadwal ulang) tidak dihapus dari heap, cukup dilewati saat di-pop.
+_reminder_heap = []
+
+def schedule_reminder(chat_id, airdrop_id, interval, next_run=None):
+    """Daftarkan (atau ganti) reminder. Tanpa next_run, reminder langsung jatuh tempo."""
+    reminder = {
+        "chat_id": chat_id,
+        "airdrop_id": airdrop_id,
+        "interval": interval,
+        "next_run": time.time() if next_run is None else next_run,
+    }
+    _reminders[(chat_id, airdrop_id)] = reminder
+    heapq.heappush(_reminder_heap, (reminder["next_run"], chat_id, airdrop_id))
+    return reminder
+
+def cancel_reminder(chat_id, airdrop_id):
+    """Hentikan reminder. Return True jika reminder tersebut ada."""
+    return _reminders.pop((chat_id, airdrop_id), None) is not None
+
+def cancel_airdrop_reminders(airdrop_id):
+    """Hentikan semua reminder (di semua chat) yang menunjuk ke airdrop ini."""
+    for key in [key for key in _reminders if key[1] == airdrop_id]:
+        del _reminders[key]
+
+def chat_reminders(chat_id):
+    """Daftar reminder aktif milik chat, urut sesuai ID airdrop."""
+    return sorted((r for r in _reminders.values() if r["chat_id"] == chat_id), key=lambda r: r["airdrop_id"])
+
+def pop_due_reminders(now, window=REMINDER_BATCH_WINDOW):
+    """
+    Ambil semua reminder yang jatuh tempo sebelum now + window dan jadwalkan
+    kiriman berikutnya (tetap mengikuti fase awal, kiriman yang terlewat tidak diulang).
+    """
+    due = []
+    horizon = now + window
+    while _reminder_heap and _reminder_heap[0][0] <= horizon:
+        next_run, chat_id, airdrop_id = heapq.heappop(_reminder_heap)
+        reminder = _reminders.get((chat_id, airdrop_id))
+        if reminder is None or reminder["next_run"] != next_run:
+            continue
+        METRICS.observe_lag(now - next_run)
+        due.append(reminder)
+        interval = reminder["interval"]
+        next_run += interval
+        # Kiriman yang masih jatuh di jendela ini sudah terwakili digest ini
+        if next_run <= horizon:
+            next_run += ((horizon - next_run) // interval + 1) * interval
+        reminder["next_run"] = next_run
+        heapq.heappush(_reminder_heap, (next_run, chat_id, airdrop_id))
+    return due
+
+def served_phases(due):
+    """
+    (chat_id, airdrop_id, fase) untuk mark_reminders_fired dari hasil pop_due_reminders.
+    next_run sudah dimajukan, jadi fase terakhir yang tercakup digest ini adalah next_run - interval.
+    """
+    return [(r["chat_id"], r["airdrop_id"], r["next_run"] - r["interval"]) for r in due]
+
+def restore_reminders(saved, now=None):
+    """
+    Pulihkan reminder dari database dengan fase aslinya (first_run + k * interval).
+    Reminder yang terlewat selama bot mati dikirim dalam REMINDER_RESTORE_JITTER detik ke depan
+    (disebar acak), sisanya di jadwal fase berikutnya ditambah jitter kecil.
+    last_fired berisi fase terakhir yang sudah dilayani (lihat mark_reminders_fired).
+    """
+    now = time.time() if now is None else now
+    for r in saved:
+        interval = r["interval"]
+        periods = max(0, -(-(now - r["first_run"]) // interval))
+        next_phase = r["first_run"] + periods * interval
+        last_fired = r["last_fired"] if r["last_fired"] is not None else r["first_run"] - interval
+        if next_phase - interval > last_fired:
+            next_run = now + random.uniform(0, REMINDER_RESTORE_JITTER)
+        else:
+            next_run = next_phase + random.uniform(0, min(REMINDER_RESTORE_JITTER, interval / 10))
+        schedule_reminder(r["chat_id"], r["airdrop_id"], interval, next_run)
+    return len(saved)
+
+def format_reminder_entry(airdrop_id, row):
+    if row is None:
+        return f"⚠️ Data airdrop ID {airdrop_id} tidak ditemukan.\n"
+    return (
+        f"🔗 *Link:* `{row[0]}`\n"
+        f"📝 *Judul:* **{row[1]}**\n"
+        f"⚙️ *Jenis:* **{row[2]}**\n"
+        f"💼 *Wallet:* `{row[3]}`\n"
+        f"⏰ *Time:* {row[4]}\n"
+    )
+
+def _reminder_entry(airdrop_id, row):
+    if row is None:
+        return format_reminder_entry(airdrop_id, row)
+    return cached_render("reminder", airdrop_id, row, format_reminder_entry)
+
+def build_reminder_digests(entries):
+    """Gabungkan entry reminder satu chat menjadi satu atau lebih pesan di bawah MAX_MESSAGE_LENGTH."""
+    header = "📢 *Reminder Airdrop*\n\n"
+    separator = "----------------------------------\n"
+    messages = []
+    text = header
+    for entry in entries:
+        if text != header and len(text) + len(separator) + len(entry) > MAX_MESSAGE_LENGTH:
+            messages.append(text)
+            text = header
+        text += (separator if text != header else "") + entry
+    messages.append(text)
+    return messages
+
+async def reminder_airdrop_job(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Tick scheduler: kumpulkan reminder yang jatuh tempo, baca semua airdrop-nya dalam
+    satu panggilan storage, lalu kirim satu digest per chat.
+    Reminder dibuat di chat pribadi, jadi chat_id sekaligus owner data airdrop-nya.
+    """
+    if _storage_ready is not None and not _storage_ready.done():
+        return  # reminder belum dipulihkan, tunggu tick berikutnya
+    now = time.time()
+    due = pop_due_reminders(now)
+    if not due:
+        return
+    try:
+        rows = await run_storage(get_airdrops, {(str(r["chat_id"]), r["airdrop_id"]) for r in due})
+        await run_storage(mark_reminders_fired, served_phases(due))
+    except Exception as e:
+        logger.error(e)
+        rows = None
+    by_chat = {}
+    for reminder in due:
+        by_chat.setdefault(reminder["chat_id"], []).append(reminder["airdrop_id"])
+    for chat_id, airdrop_ids in by_chat.items():
+        if rows is None:
+            messages = ["⚠️ Terjadi kesalahan saat mengambil data airdrop."]
+        else:
+            owner = str(chat_id)
+            messages = build_reminder_digests([_reminder_entry(i, rows[(owner, i)]) for i in sorted(airdrop_ids)])
+        for text in messages:
+            try:
+                await context.bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown", rate_limit_args=PRIORITY_LOW)
+            except Exception as e:
+                logger.error(e)
 
 async def reminder_sett(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
@@ -398,11 +2169,13 @@ async def reminder_sett_choose(update: Update, context: ContextTypes.DEFAULT_TYP
     query = update.callback_query if update.callback_query else None
     chat_id = query.from_user.id if query else update.message.chat_id
     if context.user_data.get("rem_sett_mode") == "auto":
-        interval = 21600  # 21600 detik = 6 jam (4x sehari)
+        interval = AUTO_REMINDER_INTERVAL
         context.user_data["rem_interval"] = interval
     else:
         try:
             delay_minutes = int(context.user_data.get("reminder_delay"))
+            if delay_minutes < 1:
+                raise ValueError(delay_minutes)
             interval = delay_minutes * 60
             context.user_data["rem_interval"] = interval
         except (ValueError, TypeError):
@@ -412,25 +2185,14 @@ async def reminder_sett_choose(update: Update, context: ContextTypes.DEFAULT_TYP
                 await update.message.reply_text("Delay tidak valid.", reply_markup=get_main_keyboard())
             return ConversationHandler.END
     try:
-        wb = get_workbook()
-        ws = wb.active
-        data = list(ws.values)
-        if len(data) < 2:
+        records, _ = await run_storage(read_airdrop_slice, owner_of(update), 0, 1)
+        if not records:
             if query:
                 await query.message.reply_text("⚠️ Tidak ada data airdrop yang tersimpan.", reply_markup=get_main_keyboard())
             else:
                 await update.message.reply_text("⚠️ Tidak ada data airdrop yang tersimpan.", reply_markup=get_main_keyboard())
             return ConversationHandler.END
-        keyboard = []
-        for row_number, row in enumerate(data[1:], start=2):
-            if len(row) >= 5:
-                button_text = f"Baris {row_number}: {row[1]}"
-                keyboard.append([InlineKeyboardButton(button_text, callback_data=f"rem_sett_choice_{row_number}")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        if query:
-            await query.message.reply_text("Pilih data Airdrop yang ingin di-reminder:", reply_markup=reply_markup)
-        else:
-            await update.message.reply_text("Pilih data Airdrop yang ingin di-reminder:", reply_markup=reply_markup)
+        await show_airdrop_picker(update, "rs")
         return REMINDER_SETT_CHOOSE
     except Exception as e:
         logger.error(e)
@@ -444,33 +2206,37 @@ async def reminder_sett_schedule(update: Update, context: ContextTypes.DEFAULT_T
     query = update.callback_query
     await query.answer()
     chat_id = query.from_user.id
-    row_number = int(query.data.replace("rem_sett_choice_", ""))
+    airdrop_id = int(query.data.replace("rem_sett_choice_", ""))
     interval = context.user_data.get("rem_interval")
-    job_data = {"chat_id": chat_id, "row_number": row_number, "interval": interval}
-    job_name = f"{chat_id}_reminder_{row_number}"
     job_queue = context.job_queue if context.job_queue is not None else context.application.job_queue
     if job_queue is None:
         await query.message.reply_text("Job queue tidak tersedia.", reply_markup=get_main_keyboard())
         return ConversationHandler.END
-    job = job_queue.run_repeating(reminder_airdrop_job, interval=interval, first=0, data=job_data, name=job_name)
-    context.bot_data[job_name] = job
-    await query.message.reply_text(f"✅ Reminder untuk data airdrop baris {row_number} telah dijadwalkan.", reply_markup=get_main_keyboard())
+    # Jangan sampai reminder dibuat untuk airdrop yang sedang dihapus oleh update lain
+    async with resource_lock(f"airdrop:{airdrop_id}"):
+        if await run_storage(get_airdrop, owner_of(update), airdrop_id) is None:
+            await query.message.reply_text("⚠️ Airdrop tidak ditemukan.", reply_markup=get_main_keyboard())
+            return ConversationHandler.END
+        reminder = schedule_reminder(chat_id, airdrop_id, interval)
+        await run_storage(save_reminder, chat_id, airdrop_id, interval, reminder["next_run"])
+    # Kirim reminder pertama sekarang tanpa menunggu tick berikutnya
+    job_queue.run_once(reminder_airdrop_job, 0)
+    await query.message.reply_text(f"✅ Reminder untuk data airdrop ID {airdrop_id} telah dijadwalkan.", reply_markup=get_main_keyboard())
     return ConversationHandler.END
 
 async def reminder_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     chat_id = query.from_user.id
-    job_names = [name for name in context.bot_data.keys() if name.startswith(f"{chat_id}_reminder_")]
-    if not job_names:
+    reminders = chat_reminders(chat_id)
+    if not reminders:
         await query.message.reply_text("Tidak ada reminder airdrop yang dijadwalkan.", reply_markup=get_main_keyboard())
         return ConversationHandler.END
     text = "⚙️ *Daftar Reminder Airdrop:*\n\n"
-    for name in job_names:
-        job = context.bot_data.get(name)
-        row_number = job.data["row_number"]
-        interval_minutes = int(job.data.get("interval", 0) / 60)
-        text += f"• Data Airdrop baris {row_number} | Interval: {interval_minutes} menit | Next run: {job.next_run_time}\n"
+    for reminder in reminders:
+        interval_minutes = int(reminder["interval"] / 60)
+        next_run = datetime.fromtimestamp(reminder["next_run"]).strftime("%Y-%m-%d %H:%M:%S")
+        text += f"• Data Airdrop ID {reminder['airdrop_id']} | Interval: {interval_minutes} menit | Next run: {next_run}\n"
     await query.message.reply_text(text, parse_mode="Markdown", reply_markup=get_main_keyboard())
     return ConversationHandler.END
 
@@ -478,61 +2244,493 @@ async def stop_reminder_menu(update: Update, context: ContextTypes.DEFAULT_TYPE)
     query = update.callback_query
     await query.answer()
     chat_id = query.from_user.id
-    job_names = [name for name in context.bot_data.keys() if name.startswith(f"{chat_id}_reminder_")]
-    if not job_names:
+    if not chat_reminders(chat_id):
         await query.message.reply_text("Tidak ada reminder yang sedang berjalan.", reply_markup=get_main_keyboard())
         return ConversationHandler.END
-    keyboard = []
-    for name in job_names:
-        row_number = name.split("_")[-1]
-        keyboard.append([InlineKeyboardButton(f"Stop Reminder Data Airdrop Baris {row_number}", callback_data=f"stoprem_{row_number}")])
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await query.message.reply_text("Pilih reminder yang ingin dihentikan:", reply_markup=reply_markup)
+    await show_reminder_picker(update, context)
     return STOP_REMINDER_CHOOSE
 
 async def process_stop_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
     await query.answer()
     chat_id = query.from_user.id
-    row_number = query.data.replace("stoprem_", "")
-    job_name = f"{chat_id}_reminder_{row_number}"
-    job = context.bot_data.get(job_name)
-    if job:
-        job.schedule_removal()
-        context.bot_data.pop(job_name, None)
-        await query.message.reply_text(f"✅ Reminder untuk data airdrop baris {row_number} telah dihentikan.", reply_markup=get_main_keyboard())
+    airdrop_id = int(query.data.replace("stoprem_", ""))
+    if cancel_reminder(chat_id, airdrop_id):
+        await run_storage(delete_reminder, chat_id, airdrop_id)
+        await query.message.reply_text(f"✅ Reminder untuk data airdrop ID {airdrop_id} telah dihentikan.", reply_markup=get_main_keyboard())
     else:
         await query.message.reply_text("⚠️ Reminder tidak ditemukan.", reply_markup=get_main_keyboard())
     return ConversationHandler.END
 
+async def compact_storage_job(context: ContextTypes.DEFAULT_TYPE):
+    """Job berkala: lipat WAL ke database utama walaupun belum mencapai batas ukuran."""
+    try:
+        await run_storage(compact_storage, force=True)
+    except Exception as e:
+        logger.error(e)
+
+# Telegram file_id dari export yang sudah pernah diupload: cache_key -> file_id
+_export_file_ids = {}
+
+async def send_export(message, owner, fmt, **filters):
+    """Buat (atau ambil dari cache) export milik owner lalu kirim. Upload ulang dilewati jika file_id masih ada."""
+    key, path = await run_storage(build_export, owner, fmt, **filters)
+    tier = filters.get("tier", "hot")
+    filename = os.path.splitext(EXCEL_FILE)[0] + ("" if tier == "hot" else f"_{tier}") + EXPORT_FORMATS[fmt]
+    file_id = _export_file_ids.get(key)
+    if file_id:
+        await message.reply_document(document=file_id)
+        return
+    content = await run_storage(read_file_bytes, path)
+    sent = await message.reply_document(document=content, filename=filename)
+    document = getattr(sent, "document", None)
+    if document is not None:
+        _export_file_ids[key] = document.file_id
+        while len(_export_file_ids) > EXPORT_CACHE_SIZE:
+            del _export_file_ids[next(iter(_export_file_ids))]
+
 async def download_data(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Kirim file Excel ke pengguna."""
+    """Tampilkan pilihan format file data."""
     query = update.callback_query
     await query.answer()
-    if os.path.exists(EXCEL_FILE):
-        await query.message.reply_document(document=open(EXCEL_FILE, "rb"), filename=EXCEL_FILE)
-    else:
-        await query.message.reply_text("File data tidak ditemukan.", reply_markup=get_main_keyboard())
-    return
+    keyboard = [
+        [InlineKeyboardButton("Excel (.xlsx)", callback_data="dl_xlsx"),
+         InlineKeyboardButton("CSV", callback_data="dl_csv"),
+         InlineKeyboardButton("JSONL (.gz)", callback_data="dl_jsonl")],
+    ]
+    await query.message.reply_text(
+        "Pilih format file data:\n(Filter jenis/wallet/tanggal/archive: /export xlsx type=NODE wallet=0x.. "
+        "from=2025-01-01 to=2025-12-31 tier=hot|archive|all)",
+        reply_markup=InlineKeyboardMarkup(keyboard),
+    )
 
-def main():
-    token = os.getenv("TELEGRAM_BOT_TOKEN")
-    if not token:
-        logger.error("Token bot tidak ditemukan.")
+async def download_export(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Kirim file data sesuai format yang dipilih."""
+    query = update.callback_query
+    await query.answer()
+    fmt = query.data.replace("dl_", "")
+    try:
+        await send_export(query.message, owner_of(update), fmt)
+    except Exception as e:
+        logger.error(e)
+        await query.message.reply_text("⚠️ Gagal membuat file data.", reply_markup=get_main_keyboard())
+
+@restricted
+async def export_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/export <xlsx|csv|jsonl> [type=..] [wallet=..] [from=YYYY-MM-DD] [to=YYYY-MM-DD] [tier=hot|archive|all]"""
+    usage = "Format: /export <xlsx|csv|jsonl> [type=NODE] [wallet=0x..] [from=YYYY-MM-DD] [to=YYYY-MM-DD] [tier=hot|archive|all]"
+    args = context.args or []
+    if not args or args[0].lower() not in EXPORT_FORMATS:
+        await update.message.reply_text(usage)
+        return
+    filters_ = {}
+    names = {"type": "airdrop_type", "wallet": "wallet", "from": "date_from", "to": "date_to", "tier": "tier"}
+    for arg in args[1:]:
+        name, _, value = arg.partition("=")
+        if name.lower() not in names or not value:
+            await update.message.reply_text(usage)
+            return
+        if name.lower() in ("from", "to"):
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                await update.message.reply_text(usage)
+                return
+        if name.lower() == "tier" and value.lower() not in EXPORT_TIERS:
+            await update.message.reply_text(usage)
+            return
+        if name.lower() == "tier":
+            value = value.lower()
+        filters_[names[name.lower()]] = value.upper() if name.lower() == "type" else value
+    try:
+        await send_export(update.message, owner_of(update), args[0].lower(), **filters_)
+    except Exception as e:
+        logger.error(e)
+        await update.message.reply_text("⚠️ Gagal membuat file data.", reply_markup=get_main_keyboard())
+
+@restricted
+async def dedupe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/dedupe: hapus airdrop & wallet duplikat milik user yang sudah terlanjur tersimpan."""
+    try:
+        removed, wallets = await run_storage(dedupe_storage, owner_of(update))
+    except Exception as e:
+        logger.error(e)
+        await update.message.reply_text("⚠️ Gagal menghapus duplikat.", reply_markup=get_main_keyboard())
+        return
+    for _, airdrop_id in removed:
+        cancel_airdrop_reminders(airdrop_id)
+    await update.message.reply_text(
+        f"🧹 Duplikat dihapus: {len(removed)} airdrop, {wallets} wallet.", reply_markup=get_main_keyboard()
+    )
+
+async def import_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Import massal: user mengirim file .csv/.xlsx dengan header seperti file export."""
+    document = update.message.document
+    fmt = os.path.splitext(document.file_name or "")[1].lower().lstrip(".")
+    if document.file_size and document.file_size > IMPORT_MAX_BYTES:
+        await update.message.reply_text("⚠️ File terlalu besar untuk diimport (maks 20 MB).", reply_markup=get_main_keyboard())
+        return
+    try:
+        file = await document.get_file()
+        data = bytes(await file.download_as_bytearray())
+        result = await run_storage(import_file, owner_of(update), fmt, data)
+    except Exception as e:
+        logger.error(e)
+        await update.message.reply_text(f"⚠️ Gagal mengimport file: {e}", reply_markup=get_main_keyboard())
+        return
+    text = (
+        "📥 Import selesai\n"
+        f"✅ Airdrop baru: {result['airdrops']}\n"
+        f"💳 Wallet baru: {result['wallets']}\n"
+        f"⏭ Dilewati (duplikat): {result['skipped']}\n"
+        f"❌ Error: {len(result['errors'])}\n"
+    )
+    for line, reason in result["errors"][:IMPORT_MAX_ERRORS_SHOWN]:
+        text += f"• Baris {line}: {_clip(reason, 100)}\n"
+    if len(result["errors"]) > IMPORT_MAX_ERRORS_SHOWN:
+        text += f"• ... dan {len(result['errors']) - IMPORT_MAX_ERRORS_SHOWN} error lainnya\n"
+    await update.message.reply_text(text, reply_markup=get_main_keyboard())
+
+def _format_histograms(title, items, limit=15):
+    text = f"*{title}* (n | p50 | p95 | err)\n"
+    if not items:
+        return text + "-\n"
+    for name, h in items[:limit]:
+        text += f"`{name}` {h.count} | ≤{h.quantile(0.5) * 1000:g}ms | ≤{h.quantile(0.95) * 1000:g}ms | {h.errors}\n"
+    return text
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """/stats (khusus admin): latensi handler & storage, keterlambatan reminder dan antrian."""
+    if update.effective_user.id != ADMIN_ID:
+        await deny_access(update)
+        return
+    job_queue = context.job_queue if context.job_queue is not None else context.application.job_queue
+    queue = OUTBOUND_QUEUE.stats()
+    lag = METRICS.reminder_lag
+    uptime = int(time.time() - METRICS.started)
+    text = (
+        "📈 *Statistik Bot*\n"
+        f"Uptime: {uptime // 3600}j {uptime % 3600 // 60}m\n"
+        f"Job queue: {len(job_queue.jobs()) if job_queue else 0} job | Reminder aktif: {len(_reminders)}\n"
+        f"Reminder lag: n={lag.count} p50 ≤{lag.quantile(0.5):g}s p95 ≤{lag.quantile(0.95):g}s\n"
+        f"Antrian keluar: high={queue['depth_high']} low={queue['depth_low']} "
+        f"wait p95={queue['wait_p95_ms']}ms\n\n"
+    )
+    text += _format_histograms("Handler", METRICS.snapshot("handler")) + "\n"
+    text += _format_histograms("Storage", METRICS.snapshot("storage")) + "\n"
+    text += _format_histograms("Job", METRICS.snapshot("job"))
+    # Nama operasi (yang mengandung "_") hanya muncul di dalam `code`, jadi tidak perlu di-escape
+    await update.message.reply_text(text, parse_mode="Markdown")
+
+def _prometheus_histogram(lines, metric, help_text, items):
+    lines.append(f"# HELP {metric}_seconds {help_text}")
+    lines.append(f"# TYPE {metric}_seconds histogram")
+    for labels, h in items:
+        cumulative = 0
+        for bound, n in zip(h.buckets, h.counts):
+            cumulative += n
+            lines.append(f'{metric}_seconds_bucket{{{labels}le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_seconds_bucket{{{labels}le="+Inf"}} {h.count}')
+        selector = f"{{{labels.rstrip(',')}}}" if labels else ""
+        lines.append(f"{metric}_seconds_sum{selector} {h.sum}")
+        lines.append(f"{metric}_seconds_count{selector} {h.count}")
+
+def render_prometheus(app: Application):
+    """Semua metrics dalam format teks Prometheus."""
+    lines = []
+    for kind in ("handler", "storage", "job"):
+        items = METRICS.snapshot(kind)
+        _prometheus_histogram(lines, f"airdrop_bot_{kind}", f"Durasi {kind}", [(f'name="{name}",', h) for name, h in items])
+        lines.append(f"# TYPE airdrop_bot_{kind}_errors_total counter")
+        lines.extend(f'airdrop_bot_{kind}_errors_total{{name="{name}"}} {h.errors}' for name, h in items)
+    _prometheus_histogram(lines, "airdrop_bot_reminder_lag", "Keterlambatan reminder dari jadwal", [("", METRICS.reminder_lag)])
+    queue = OUTBOUND_QUEUE.stats()
+    gauges = {
+        "airdrop_bot_job_queue_size": len(app.job_queue.jobs()) if app.job_queue else 0,
+        "airdrop_bot_update_queue_size": app.update_queue.qsize(),
+        "airdrop_bot_reminders_active": len(_reminders),
+        "airdrop_bot_outbound_queue_depth_high": queue["depth_high"],
+        "airdrop_bot_outbound_queue_depth_low": queue["depth_low"],
+        "airdrop_bot_uptime_seconds": round(time.time() - METRICS.started, 1),
+    }
+    for metric, value in gauges.items():
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+HTTP_REASONS = {
+    200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+    408: "Request Timeout", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+class HTTPError(Exception):
+    def __init__(self, status, error):
+        super().__init__(error)
+        self.status = status
+        self.error = error
+
+async def handle_webhook_request(app: Application, secret, method, path, headers, body):
+    """Routing request HTTP webhook. Return (status, payload dict)."""
+    if path == "/health":
+        return 200, {"status": "ok", "update_queue": app.update_queue.qsize()}
+    if path != WEBHOOK_PATH:
+        return 404, {"error": "not found"}
+    if method != "POST":
+        return 405, {"error": "method not allowed"}
+    # Dibandingkan sebagai bytes: header di-decode latin-1 dan compare_digest menolak str non-ASCII
+    token = headers.get("x-telegram-bot-api-secret-token", "").encode("latin-1")
+    if not hmac.compare_digest(token, secret.encode()):
+        return 403, {"error": "invalid secret token"}
+    try:
+        update = Update.de_json(json.loads(body), app.bot)
+    except Exception as e:
+        logger.error(e)
+        return 400, {"error": "invalid update"}
+    # Langsung dimasukkan ke antrian Application, Telegram tidak perlu menunggu handler selesai
+    await app.update_queue.put(update)
+    return 200, {"ok": True}
+
+async def handle_metrics_request(app: Application, method, path, headers, body):
+    """Routing request HTTP endpoint metrics. Return (status, payload)."""
+    if path != "/metrics":
+        return 404, {"error": "not found"}
+    if method != "GET":
+        return 405, {"error": "method not allowed"}
+    return 200, render_prometheus(app)
+
+async def read_http_request(reader):
+    """Baca satu request HTTP/1.1. Return (method, path, headers, body), HTTPError jika melewati batas."""
+    request_line = await reader.readline()
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    header_bytes = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        header_bytes += len(line)
+        if len(headers) >= HTTP_MAX_HEADERS or header_bytes > HTTP_MAX_HEADER_BYTES:
+            raise HTTPError(431, "request header fields too large")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", "0"))
+    if length > WEBHOOK_MAX_BODY:
+        raise HTTPError(413, "payload too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+async def handle_http_connection(handle_request, reader, writer):
+    """
+    Server HTTP/1.1 minimal: satu request per koneksi. handle_request(method, path, headers, body)
+    mengembalikan (status, payload); payload dict dikirim sebagai JSON, str sebagai teks biasa.
+    """
+    status, payload = 400, {"error": "bad request"}
+    try:
+        # Satu deadline untuk seluruh request, agar header yang dikirim sedikit-sedikit tidak menahan koneksi
+        method, path, headers, body = await asyncio.wait_for(read_http_request(reader), HTTP_READ_TIMEOUT)
+        status, payload = await handle_request(method, path.split("?", 1)[0], headers, body)
+    except asyncio.TimeoutError:
+        status, payload = 408, {"error": "request timeout"}
+    except HTTPError as e:
+        status, payload = e.status, {"error": e.error}
+    except (ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+        logger.error(e)
+    except Exception as e:
+        # Error tak terduga tetap dibalas (dan koneksi ditutup), jangan sampai koneksi menggantung
+        logger.exception(e)
+        status, payload = 500, {"error": "internal server error"}
+    try:
+        if isinstance(payload, str):
+            content, content_type = payload.encode(), "text/plain; version=0.0.4"
+        else:
+            content, content_type = json.dumps(payload).encode(), "application/json"
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(content)}\r\nConnection: close\r\n\r\n".encode()
+            + content
+        )
+        await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+async def run_webhook(app: Application):
+    """Jalankan bot dalam mode webhook dengan server HTTP bawaan sampai dihentikan (Ctrl+C / SIGTERM)."""
+    secret = WEBHOOK_SECRET
+    if not secret:
+        if not WEBHOOK_URL:
+            logger.error("Mode webhook membutuhkan WEBHOOK_SECRET (atau WEBHOOK_URL agar secret dibuat otomatis).")
+            return
+        # Webhook didaftarkan sendiri, jadi secret acak cukup diketahui oleh Telegram & proses ini
+        secret = secrets.token_urlsafe(32)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:
+            pass
+    # Dipakai _warm_up_storage untuk menghentikan bot jika storage gagal disiapkan
+    app.bot_data["stop_running"] = stop.set
+    async with app:
+        await app.start()
+        if WEBHOOK_URL:
+            await app.bot.set_webhook(
+                WEBHOOK_URL.rstrip("/") + WEBHOOK_PATH,
+                secret_token=secret,
+                allowed_updates=Update.ALL_TYPES,
+            )
+        server = await asyncio.start_server(
+            partial(handle_http_connection, partial(handle_webhook_request, app, secret)), WEBHOOK_LISTEN, WEBHOOK_PORT
+        )
+        logger.info("Webhook aktif di %s:%d%s", WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH)
+        await on_startup(app)
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            await stop_metrics_server(app)
+            await app.stop()
+
+# Task warm-up storage (buka database/migrasi + pulihkan reminder) yang berjalan di background
+# setelah bot mulai menerima update. None = warm-up tidak dipakai (storage disiapkan langsung).
+_storage_ready = None
+
+async def _warm_up_storage(app: Application):
+    """
+    Siapkan storage, diulang sampai STORAGE_WARMUP_RETRIES kali. Jika tetap gagal, bot dihentikan:
+    lebih baik mati dan terlihat oleh supervisor daripada terus menerima update tanpa bisa membalas.
+    """
+    for attempt in range(1, STORAGE_WARMUP_RETRIES + 1):
+        started = time.perf_counter()
+        try:
+            await run_storage(init_storage)
+            restored = restore_reminders(await run_storage(load_reminders))
+        except Exception as e:
+            if attempt == STORAGE_WARMUP_RETRIES:
+                logger.critical("Storage gagal disiapkan setelah %d percobaan, bot dihentikan: %s", attempt, e)
+                stop = app.bot_data.get("stop_running") if app is not None else None
+                if stop is not None:
+                    stop()
+                elif app is not None:
+                    app.stop_running()
+                raise
+            logger.error("Storage gagal disiapkan (percobaan %d/%d): %s", attempt, STORAGE_WARMUP_RETRIES, e)
+            await asyncio.sleep(STORAGE_WARMUP_RETRY_DELAY * attempt)
+            continue
+        logger.info("Storage siap dalam %.2f detik, %d reminder dipulihkan.", time.perf_counter() - started, restored)
         return
 
-    # Pastikan file Excel tersedia
-    get_workbook()
+def start_storage_warmup(app: Application = None):
+    global _storage_ready
+    if _storage_ready is None:
+        _storage_ready = asyncio.ensure_future(_warm_up_storage(app))
+    return _storage_ready
 
-    app = Application.builder().token(token).build()
+async def wait_storage_ready():
+    if _storage_ready is not None:
+        await asyncio.shield(_storage_ready)
 
+async def readiness_gate(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Dijalankan paling awal: update yang datang saat storage belum siap menunggu warm-up selesai."""
+    try:
+        await wait_storage_ready()
+    except Exception:
+        # Bot sedang dihentikan (lihat _warm_up_storage), beri tahu user alih-alih diam saja
+        text = "⚠️ Bot sedang mengalami gangguan penyimpanan data. Silakan coba lagi nanti."
+        try:
+            if update.callback_query:
+                await update.callback_query.answer(text, show_alert=True)
+            elif update.effective_message:
+                await update.effective_message.reply_text(text)
+        except Exception as e:
+            logger.error(e)
+        raise ApplicationHandlerStop
+
+async def on_startup(app: Application):
+    """Dipanggil setelah Application siap: mulai warm-up storage tanpa menunggunya, lalu endpoint metrics."""
+    start_storage_warmup(app)
+    await start_metrics_server(app)
+
+async def start_metrics_server(app: Application):
+    """Jalankan endpoint /metrics jika METRICS_PORT diisi."""
+    if not METRICS_PORT:
+        return
+    app.bot_data["metrics_server"] = await asyncio.start_server(
+        partial(handle_http_connection, partial(handle_metrics_request, app)), METRICS_LISTEN, METRICS_PORT
+    )
+    logger.info("Metrics aktif di http://%s:%d/metrics", METRICS_LISTEN, METRICS_PORT)
+
+async def stop_metrics_server(app: Application):
+    server = app.bot_data.pop("metrics_server", None)
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+def instrument_handlers(app: Application):
+    """Bungkus callback semua handler yang terdaftar (termasuk di dalam ConversationHandler) dengan timed_callback."""
+    pending = [handler for handlers in app.handlers.values() for handler in handlers]
+    while pending:
+        handler = pending.pop()
+        if isinstance(handler, ConversationHandler):
+            pending.extend(handler.entry_points)
+            pending.extend(handler.fallbacks)
+            for state_handlers in handler.states.values():
+                pending.extend(state_handlers)
+        else:
+            handler.callback = timed_callback("handler", handler.callback)
+
+def build_application(token):
+    """Buat Application lengkap dengan job berkala dan semua handler."""
+    app = (
+        Application.builder()
+        .token(token)
+        .base_url(BOT_API_BASE_URL)
+        .base_file_url(BOT_API_BASE_FILE_URL)
+        .rate_limiter(OUTBOUND_QUEUE)
+        .concurrent_updates(PerUserUpdateProcessor(UPDATE_CONCURRENCY))
+        .post_init(on_startup)
+        .post_shutdown(stop_metrics_server)
+        .build()
+    )
+    app.job_queue.run_repeating(
+        timed_callback("job", reminder_airdrop_job), interval=REMINDER_TICK, first=REMINDER_TICK, name="reminder_scheduler"
+    )
+    app.job_queue.run_repeating(
+        timed_callback("job", compact_storage_job), interval=WAL_COMPACT_INTERVAL, first=WAL_COMPACT_INTERVAL, name="storage_compaction"
+    )
+    if ARCHIVE_AFTER_DAYS > 0:
+        app.job_queue.run_repeating(
+            timed_callback("job", archive_job), interval=ARCHIVE_CHECK_INTERVAL, first=REMINDER_TICK, name="archive_expired"
+        )
+
+    app.add_handler(TypeHandler(Update, readiness_gate), group=-2)
+    app.add_handler(TypeHandler(Update, access_guard), group=-1)
     app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("export", export_command))
+    app.add_handler(CommandHandler("search", search_command))
+    app.add_handler(CommandHandler("dedupe", dedupe_command))
+    app.add_handler(CommandHandler("stats", stats_command))
+    app.add_handler(CommandHandler("archive", archive_list))
+    app.add_handler(CommandHandler("restore", restore_command))
+    app.add_handler(CallbackQueryHandler(archive_list, pattern="^archive_list$"))
+    app.add_handler(CallbackQueryHandler(summary, pattern="^summary$"))
+    app.add_handler(CallbackQueryHandler(archive_page, pattern="^arc_(n|p)_\\d+$"))
+    app.add_handler(MessageHandler(
+        filters.Document.FileExtension("csv") | filters.Document.FileExtension("xlsx"), import_document
+    ))
     app.add_handler(CallbackQueryHandler(download_data, pattern="^download_data$"))
+    app.add_handler(CallbackQueryHandler(download_export, pattern="^dl_(xlsx|csv|jsonl)$"))
 
     stop_reminder_conv_handler = ConversationHandler(
         entry_points=[CallbackQueryHandler(stop_reminder_menu, pattern="^stop_reminder$")],
         states={
-            STOP_REMINDER_CHOOSE: [CallbackQueryHandler(process_stop_reminder, pattern="^stoprem_\\d+$")],
+            STOP_REMINDER_CHOOSE: [
+                CallbackQueryHandler(process_stop_reminder, pattern="^stoprem_\\d+$"),
+                CallbackQueryHandler(picker_page, pattern="^pg:sr:"),
+            ],
         },
         fallbacks=[],
     )
@@ -555,7 +2753,10 @@ def main():
             INPUT_AIRDROP_LINK: [MessageHandler(filters.TEXT & ~filters.COMMAND, receive_airdrop_link)],
             INPUT_AIRDROP_TITLE: [MessageHandler(filters.TEXT & ~filters.COMMAND, receive_airdrop_title)],
             CHOOSE_AIRDROP_TYPE: [CallbackQueryHandler(choose_wallet, pattern="^airdrop_type_")],
-            CHOOSE_WALLET: [CallbackQueryHandler(save_airdrop, pattern="^wallet_")],
+            CHOOSE_WALLET: [
+                CallbackQueryHandler(save_airdrop, pattern="^wallet_\\d+$"),
+                CallbackQueryHandler(picker_page, pattern="^pg:cw:"),
+            ],
         },
         fallbacks=[],
     )
@@ -564,7 +2765,10 @@ def main():
     delete_wallet_conv_handler = ConversationHandler(
         entry_points=[CallbackQueryHandler(delete_wallet, pattern="^delete_wallet$")],
         states={
-            CHOOSE_WALLET_DELETE: [CallbackQueryHandler(process_delete_wallet, pattern="^delwallet_")],
+            CHOOSE_WALLET_DELETE: [
+                CallbackQueryHandler(process_delete_wallet, pattern="^delwallet_"),
+                CallbackQueryHandler(picker_page, pattern="^pg:dw:"),
+            ],
         },
         fallbacks=[],
     )
@@ -573,14 +2777,31 @@ def main():
     delete_airdrop_conv_handler = ConversationHandler(
         entry_points=[CallbackQueryHandler(delete_airdrop, pattern="^delete_airdrop$")],
         states={
-            CHOOSE_AIRDROP_DELETE: [CallbackQueryHandler(process_delete_airdrop, pattern="^delairdrop_")],
+            CHOOSE_AIRDROP_DELETE: [
+                CallbackQueryHandler(process_delete_airdrop, pattern="^delairdrop_"),
+                CallbackQueryHandler(picker_page, pattern="^pg:da:"),
+            ],
         },
         fallbacks=[],
     )
     app.add_handler(delete_airdrop_conv_handler)
 
+    finish_airdrop_conv_handler = ConversationHandler(
+        entry_points=[CallbackQueryHandler(finish_airdrop, pattern="^finish_airdrop$")],
+        states={
+            CHOOSE_AIRDROP_FINISH: [
+                CallbackQueryHandler(process_finish_airdrop, pattern="^finairdrop_\\d+$"),
+                CallbackQueryHandler(picker_page, pattern="^pg:fa:"),
+            ],
+        },
+        fallbacks=[],
+    )
+    app.add_handler(finish_airdrop_conv_handler)
+
     app.add_handler(CallbackQueryHandler(list_wallet, pattern="^list_wallet$"))
     app.add_handler(CallbackQueryHandler(list_airdrop, pattern="^list_airdrop$"))
+    app.add_handler(CallbackQueryHandler(list_airdrop_page, pattern="^lstair_(n|p)_\\d+$"))
+    app.add_handler(CallbackQueryHandler(search_page, pattern="^srch_(n|p)_\\d+$"))
     app.add_handler(CallbackQueryHandler(reminder_list, pattern="^reminder_lst$"))
 
     reminder_sett_conv_handler = ConversationHandler(
@@ -588,13 +2809,55 @@ def main():
         states={
             REMINDER_SETT_MODE: [CallbackQueryHandler(choose_reminder_mode, pattern="^rem_sett_mode_(auto|manual)$")],
             REMINDER_SETT_DELAY: [MessageHandler(filters.TEXT & ~filters.COMMAND, reminder_sett_input_delay)],
-            REMINDER_SETT_CHOOSE: [CallbackQueryHandler(reminder_sett_schedule, pattern="^rem_sett_choice_\\d+$")],
+            REMINDER_SETT_CHOOSE: [
+                CallbackQueryHandler(reminder_sett_schedule, pattern="^rem_sett_choice_\\d+$"),
+                CallbackQueryHandler(picker_page, pattern="^pg:rs:"),
+            ],
         },
         fallbacks=[],
     )
     app.add_handler(reminder_sett_conv_handler)
 
-    app.run_polling()
+    search_conv_handler = ConversationHandler(
+        entry_points=[CallbackQueryHandler(search_airdrop, pattern="^search_airdrop$")],
+        states={
+            SEARCH_INPUT: [MessageHandler(filters.TEXT & ~filters.COMMAND, receive_search_query)],
+        },
+        fallbacks=[],
+    )
+    app.add_handler(search_conv_handler)
+    instrument_handlers(app)
+    return app
+
+def run_offline_dedupe():
+    """python bot.py dedupe: hapus duplikat milik semua user tanpa menjalankan bot."""
+    STORAGE_EXECUTOR.submit(init_storage).result()
+    removed, wallets = STORAGE_EXECUTOR.submit(dedupe_storage).result()
+    logger.info("Duplikat dihapus: %d airdrop, %d wallet.", len(removed), wallets)
+    STORAGE_EXECUTOR.submit(close_storage).result()
+    STORAGE_EXECUTOR.shutdown(wait=True)
+
+def main():
+    if sys.argv[1:] == ["dedupe"]:
+        run_offline_dedupe()
+        return
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token:
+        logger.error("Token bot tidak ditemukan.")
+        return
+
+    # Database & reminder disiapkan di background (on_startup), bot langsung mulai menerima update
+    app = build_application(token)
+    if BOT_MODE == "webhook":
+        asyncio.run(run_webhook(app))
+    else:
+        app.run_polling()
+    # Tunggu semua tulisan yang masih antre selesai sebelum keluar
+    STORAGE_EXECUTOR.submit(close_storage).result()
+    STORAGE_EXECUTOR.shutdown(wait=True)
+    # Dihentikan karena storage gagal disiapkan: keluar dengan status error agar terlihat oleh supervisor
+    if _storage_ready is not None and _storage_ready.done() and not _storage_ready.cancelled() and _storage_ready.exception():
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -27,7 +27,18 @@ cd autosave-airdrop
 
 # Cek & buat file .env jika belum ada
 if [ ! -f .env ]; then
-    touch .env
+    cat > .env <<'EOF'
+TELEGRAM_BOT_TOKEN=
+ADMIN_ID=
+# Opsional (lihat bagian CONFIGURATION di README.md):
+# ALLOWED_USERS=123,456
+# DB_FILE=shareithub_data_airdrop.db
+# ARCHIVE_AFTER_DAYS=0
+# BOT_MODE=polling
+# WEBHOOK_URL=https://example.com/telegram
+# WEBHOOK_SECRET=
+# METRICS_PORT=0
+EOF
 fi
 
 cek_env() {
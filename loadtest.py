@@ -0,0 +1,417 @@
+"""
+Load test end-to-end: bot.py dijalankan utuh (main(), polling, ConversationHandler, JobQueue,
+antrian pesan keluar) melawan server Bot API tiruan lokal.
+
+Contoh:
+    python loadtest.py --stages 5,10,25,50 --stage-seconds 20 --reminders 300 --json hasil.json
+
+Alur:
+1. Server Bot API tiruan dijalankan (getUpdates long polling, sendMessage, editMessageText, ...).
+2. bot.py dijalankan sebagai subprocess dengan BOT_API_BASE_URL mengarah ke server tersebut.
+3. Setup: setiap user aktif menambah wallet, user reminder menambah airdrop & reminder (interval 1 menit).
+4. Setiap stage menjalankan N user bersamaan yang terus mengulang: add airdrop (5 langkah),
+   list airdrop, lalu delete airdrop (2 langkah).
+Laporan per stage: update/detik, latensi balasan end-to-end (p50/p95/p99), timeout dan jumlah
+digest reminder yang diterima, serta stage tempat throughput mulai jatuh (collapse point).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import parse_qsl
+
+BOT_TOKEN = "123456:LOADTEST"
+BOT_USER = {"id": 123456, "is_bot": True, "first_name": "Airdrop Bot", "username": "airdrop_loadtest_bot"}
+# Method yang dianggap balasan ke user (answerCallbackQuery tidak dihitung)
+REPLY_METHODS = {"sendMessage", "editMessageText", "sendDocument", "editMessageReplyMarkup"}
+BASE_USER_ID = 10_000
+
+
+class FakeBotAPI:
+    """Server Bot API tiruan (HTTP/1.1 keep-alive) yang mencatat setiap balasan per chat."""
+
+    def __init__(self):
+        self.updates = []
+        self.update_event = asyncio.Event()
+        self.update_ids = itertools.count(1)
+        self.message_ids = itertools.count(1)
+        self.inboxes = {}
+        self.requests = 0
+        self.digests = 0
+
+    def inbox(self, chat_id):
+        if chat_id not in self.inboxes:
+            self.inboxes[chat_id] = asyncio.Queue()
+        return self.inboxes[chat_id]
+
+    def push_update(self, update):
+        """Masukkan update ke antrian getUpdates. Return waktu update tersedia untuk bot."""
+        update["update_id"] = next(self.update_ids)
+        self.updates.append(update)
+        self.update_event.set()
+        return time.perf_counter()
+
+    def _message(self, chat_id, text=None, **extra):
+        message = {
+            "message_id": next(self.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            **extra,
+        }
+        if text is not None:
+            message["text"] = text
+        return message
+
+    async def get_updates(self, params):
+        timeout = float(params.get("timeout", 0) or 0)
+        limit = int(params.get("limit", 100) or 100)
+        if not self.updates and timeout:
+            self.update_event.clear()
+            try:
+                await asyncio.wait_for(self.update_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        batch, self.updates = self.updates[:limit], self.updates[limit:]
+        return batch
+
+    async def call(self, method, params):
+        self.requests += 1
+        if method == "getUpdates":
+            return await self.get_updates(params)
+        if method == "getMe":
+            return BOT_USER
+        chat_id = params.get("chat_id")
+        if method in REPLY_METHODS and chat_id is not None:
+            chat_id = int(chat_id)
+            text = params.get("text", "")
+            if text.startswith("📢"):
+                self.digests += 1
+            else:
+                self.inbox(chat_id).put_nowait((time.perf_counter(), method, params))
+            if method == "sendDocument":
+                n = next(self.message_ids)
+                return self._message(chat_id, document={"file_id": f"file{n}", "file_unique_id": f"u{n}"})
+            return self._message(chat_id, text or "-")
+        return True
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length", "0"))
+                body = await reader.readexactly(length) if length else b""
+                params = parse_params(headers.get("content-type", ""), body)
+                method = path.rstrip("/").rsplit("/", 1)[-1]
+                result = await self.call(method, params)
+                content = json.dumps({"ok": True, "result": result}).encode()
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(content)}\r\n\r\n".encode()
+                    + content
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, asyncio.CancelledError):
+            # CancelledError: koneksi (mis. getUpdates yang sedang menunggu) diputus saat harness selesai
+            pass
+        finally:
+            writer.close()
+
+
+def parse_params(content_type, body):
+    """Parameter request Bot API dari body form-urlencoded atau multipart (nilai tetap string)."""
+    if content_type.startswith("multipart/form-data"):
+        return {
+            name: value
+            for name, value in re.findall(rb'name="([^"]+)"\r\n\r\n(.*?)\r\n--', body, re.S)
+            for name, value in [(name.decode(), value.decode("utf-8", "replace"))]
+        }
+    if body[:1] == b"{":
+        return {k: v if isinstance(v, str) else json.dumps(v) for k, v in json.loads(body).items()}
+    return dict(parse_qsl(body.decode()))
+
+
+def callback_buttons(params):
+    """Semua callback_data pada reply_markup sebuah balasan."""
+    markup = params.get("reply_markup")
+    if not markup:
+        return []
+    markup = json.loads(markup) if isinstance(markup, str) else markup
+    return [button.get("callback_data", "") for row in markup.get("inline_keyboard", []) for button in row]
+
+
+class StepTimeout(Exception):
+    pass
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = []
+        self.steps = 0
+        self.timeouts = 0
+
+
+class VirtualUser:
+    """Satu user Telegram tiruan yang menjalankan skenario langkah demi langkah."""
+
+    def __init__(self, api, user_id, args):
+        self.api = api
+        self.user_id = user_id
+        self.args = args
+        self.user = {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+        self.chat = {"id": user_id, "type": "private"}
+        self.stats = None
+
+    def _text_update(self, text):
+        message = {"message_id": next(self.api.message_ids), "date": int(time.time()), "chat": self.chat, "from": self.user, "text": text}
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"message": message}
+
+    def _callback_update(self, data):
+        message = {"message_id": next(self.api.message_ids), "date": int(time.time()), "chat": self.chat, "from": BOT_USER, "text": "-"}
+        return {"callback_query": {"id": str(next(self.api.message_ids)), "from": self.user, "chat_instance": str(self.user_id),
+                                   "data": data, "message": message}}
+
+    async def step(self, update, expect=None):
+        """
+        Kirim satu update lalu tunggu balasan. expect: regex callback_data yang harus ada di balasan
+        (untuk langkah yang menampilkan keyboard pilihan). Return (params balasan, callback_data yang cocok).
+        """
+        inbox = self.api.inbox(self.user_id)
+        while not inbox.empty():
+            inbox.get_nowait()
+        sent_at = self.api.push_update(update)
+        deadline = sent_at + self.args.step_timeout
+        first = None
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                if self.stats:
+                    self.stats.timeouts += 1
+                raise StepTimeout
+            try:
+                received_at, method, params = await asyncio.wait_for(inbox.get(), remaining)
+            except asyncio.TimeoutError:
+                continue
+            if first is None:
+                first = received_at
+            matches = [data for data in callback_buttons(params) if expect and re.match(expect, data)]
+            if expect is None or matches:
+                if self.stats:
+                    self.stats.steps += 1
+                    self.stats.latencies.append((first - sent_at) * 1000)
+                if self.args.think_time:
+                    await asyncio.sleep(random.uniform(0, 2 * self.args.think_time))
+                return params, matches
+
+    async def press(self, data, expect=None):
+        return await self.step(self._callback_update(data), expect)
+
+    async def say(self, text, expect=None):
+        return await self.step(self._text_update(text), expect)
+
+    async def add_wallet(self):
+        await self.press("add_wallet")
+        await self.say("0x%040x" % random.getrandbits(160), expect=r"^wallet_type_")
+        await self.press("wallet_type_evm")
+
+    async def add_airdrop(self):
+        await self.press("add_airdrop")
+        await self.say(f"https://t.me/campaign_{self.user_id}_{random.getrandbits(48):012x}")
+        await self.say(f"LOAD {random.getrandbits(16)}", expect=r"^airdrop_type_")
+        _, wallets = await self.press("airdrop_type_node", expect=r"^wallet_\d+$")
+        await self.press(wallets[0])
+
+    async def list_airdrop(self):
+        await self.press("list_airdrop")
+
+    async def delete_airdrop(self):
+        _, choices = await self.press("delete_airdrop", expect=r"^delairdrop_\d+$")
+        await self.press(choices[-1])
+
+    async def add_reminder(self, index):
+        await self.press("reminder_sett", expect=r"^rem_sett_mode_")
+        await self.press("rem_sett_mode_manual")
+        _, choices = await self.say("1", expect=r"^rem_sett_choice_\d+$")
+        await self.press(choices[index % len(choices)])
+
+    async def workload(self, stop):
+        """Skenario stage: add airdrop, list, delete (jumlah airdrop user tetap stabil)."""
+        while not stop.is_set():
+            try:
+                await self.add_airdrop()
+                await self.list_airdrop()
+                await self.delete_airdrop()
+            except StepTimeout:
+                # Percakapan bisa tertinggal di tengah jalan, mulai lagi dari awal
+                continue
+
+
+def start_bot(args, api_port, user_ids, workdir):
+    env = dict(os.environ)
+    env.update({
+        "TELEGRAM_BOT_TOKEN": BOT_TOKEN,
+        "ADMIN_ID": str(user_ids[0]),
+        "ALLOWED_USERS": ",".join(str(i) for i in user_ids),
+        "BOT_API_BASE_URL": f"http://127.0.0.1:{api_port}/bot",
+        "BOT_API_BASE_FILE_URL": f"http://127.0.0.1:{api_port}/file/bot",
+        "BOT_MODE": "polling",
+    })
+    if args.unthrottled:
+        env.update({"OUTBOUND_GLOBAL_RATE": "100000", "OUTBOUND_CHAT_RATE": "1000", "OUTBOUND_CHAT_BURST": "1000"})
+    log = open(os.path.join(workdir, "bot.log"), "w")
+    bot_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bot.py")
+    return subprocess.Popen([sys.executable, bot_path], cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT), log
+
+
+def percentile(samples, q):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def run_stage(api, users, seconds):
+    stats = Stats()
+    for user in users:
+        user.stats = stats
+    digests_before = api.digests
+    stop = asyncio.Event()
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(user.workload(stop)) for user in users]
+    await asyncio.sleep(seconds)
+    stop.set()
+    elapsed = time.perf_counter() - started
+    # Langkah yang sedang berjalan dibiarkan selesai (atau timeout) tanpa ikut dihitung
+    for user in users:
+        user.stats = None
+    await asyncio.wait(tasks)
+    return {
+        "users": len(users),
+        "updates": stats.steps,
+        "updates_per_sec": round(stats.steps / elapsed, 1),
+        "p50_ms": round(percentile(stats.latencies, 0.50), 1),
+        "p95_ms": round(percentile(stats.latencies, 0.95), 1),
+        "p99_ms": round(percentile(stats.latencies, 0.99), 1),
+        "timeouts": stats.timeouts,
+        "reminder_digests": api.digests - digests_before,
+    }
+
+
+def find_collapse(results, latency_slo):
+    """Stage pertama di mana throughput tidak naik lagi (<5%) atau p95 melewati SLO / ada timeout."""
+    previous = None
+    for current in results:
+        if current["p95_ms"] > latency_slo or current["timeouts"]:
+            return current["users"], f"p95 > {latency_slo} ms atau ada timeout"
+        if previous is not None and current["updates_per_sec"] < previous["updates_per_sec"] * 1.05:
+            return current["users"], "throughput tidak naik lagi"
+        previous = current
+    return None, None
+
+
+async def run(args):
+    stages = sorted({int(v) for v in args.stages.split(",") if v})
+    api = FakeBotAPI()
+    server = await asyncio.start_server(api.handle_connection, "127.0.0.1", args.port)
+    api_port = server.sockets[0].getsockname()[1]
+
+    active_ids = [BASE_USER_ID + i for i in range(max(stages))]
+    reminder_users = max(1, -(-args.reminders // args.reminders_per_user)) if args.reminders else 0
+    reminder_ids = [BASE_USER_ID + len(active_ids) + i for i in range(reminder_users)]
+    workdir = tempfile.mkdtemp(prefix="airdrop-loadtest-")
+    process, log = start_bot(args, api_port, active_ids + reminder_ids, workdir)
+    print(f"Bot berjalan (pid {process.pid}), data & log di {workdir}")
+    results = []
+    try:
+        # Tunggu sampai bot mulai polling
+        while api.requests < 2:
+            if process.poll() is not None:
+                raise RuntimeError(f"bot berhenti, lihat {workdir}/bot.log")
+            await asyncio.sleep(0.1)
+
+        setup_started = time.perf_counter()
+        active = [VirtualUser(api, user_id, args) for user_id in active_ids]
+        await asyncio.gather(*(user.add_wallet() for user in active))
+
+        async def setup_reminders(user, count):
+            await user.add_wallet()
+            for _ in range(count):
+                await user.add_airdrop()
+            for i in range(count):
+                await user.add_reminder(i)
+
+        remaining = args.reminders
+        jobs = []
+        for user_id in reminder_ids:
+            count = min(args.reminders_per_user, remaining)
+            remaining -= count
+            jobs.append(setup_reminders(VirtualUser(api, user_id, args), count))
+        await asyncio.gather(*jobs)
+        print(f"Setup selesai dalam {time.perf_counter() - setup_started:.1f} detik "
+              f"({len(active)} user aktif, {args.reminders} reminder)")
+
+        print(f"{'users':>6}{'upd/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'timeout':>9}{'digest':>8}")
+        for n in stages:
+            result = await run_stage(api, active[:n], args.stage_seconds)
+            results.append(result)
+            print(f"{result['users']:>6}{result['updates_per_sec']:>9}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                  f"{result['p99_ms']:>10}{result['timeouts']:>9}{result['reminder_digests']:>8}")
+    finally:
+        process.send_signal(signal.SIGINT)
+        try:
+            # Tunggu di thread lain: server tiruan harus tetap melayani getUpdates terakhir saat bot shutdown
+            await asyncio.to_thread(process.wait, 30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
+        server.close()
+
+    users, reason = find_collapse(results, args.latency_slo)
+    if users:
+        print(f"Collapse point: {users} user ({reason})")
+    else:
+        print("Collapse point: tidak tercapai pada stage yang diuji")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"stages": results, "collapse_users": users, "collapse_reason": reason,
+                       "reminders": args.reminders, "unthrottled": args.unthrottled}, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test end-to-end bot melawan server Bot API tiruan.")
+    parser.add_argument("--stages", default="5,10,25,50", help="jumlah user bersamaan per stage (dipisah koma)")
+    parser.add_argument("--stage-seconds", type=float, default=20)
+    parser.add_argument("--reminders", type=int, default=300, help="jumlah reminder aktif (interval 1 menit)")
+    parser.add_argument("--reminders-per-user", type=int, default=5)
+    parser.add_argument("--think-time", type=float, default=0.0, help="rata-rata jeda antar langkah per user (detik)")
+    parser.add_argument("--step-timeout", type=float, default=30.0, help="batas tunggu balasan per langkah (detik)")
+    parser.add_argument("--latency-slo", type=float, default=2000.0, help="batas p95 (ms) untuk collapse point")
+    parser.add_argument("--unthrottled", action="store_true",
+                        help="naikkan batas antrian pesan keluar bot (default: batas Telegram yang sebenarnya)")
+    parser.add_argument("--port", type=int, default=0, help="port server Bot API tiruan (0 = acak)")
+    parser.add_argument("--json", help="simpan hasil ke file JSON")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ADMIN_ID", "1")
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:test")
+
+import bot  # noqa: E402
+from telegram.error import RetryAfter  # noqa: E402
+
+
+class OutboundQueueTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # 10 pesan/detik per chat tanpa burst: request kedua ke chat yang sama harus menunggu ~0.1 detik
+        patches = {"OUTBOUND_GLOBAL_RATE": 1000, "OUTBOUND_CHAT_RATE": 10, "OUTBOUND_CHAT_BURST": 1}
+        for name, value in patches.items():
+            patcher = mock.patch.object(bot, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.queue = bot.OutboundQueue()
+        self.sent = []
+
+    def send(self, chat_id, label, priority=None, callback=None):
+        async def record():
+            self.sent.append((label, time.monotonic()))
+            return label
+        return self.queue.process_request(callback or record, (), {}, "sendMessage", {"chat_id": chat_id}, priority)
+
+    def order(self):
+        return [label for label, _ in self.sent]
+
+    async def test_per_chat_order_is_kept(self):
+        await asyncio.gather(*(self.send(5, i) for i in range(6)))
+        self.assertEqual(self.order(), list(range(6)))
+
+    async def test_low_priority_waits_for_queued_high_priority(self):
+        await self.send(5, "high-1")  # token chat 5 habis
+        # high-2 antre di chat 5; low untuk chat 6 punya token tapi harus menunggu high-2
+        await asyncio.gather(self.send(5, "high-2"), self.send(6, "low", bot.PRIORITY_LOW))
+        self.assertEqual(self.order(), ["high-1", "high-2", "low"])
+
+    async def test_retry_after_pauses_all_chats(self):
+        calls = []
+
+        async def limited():
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise RetryAfter(1)
+            return "ok"
+
+        started = time.monotonic()
+        first = asyncio.ensure_future(self.send(5, "limited", callback=limited))
+        await asyncio.sleep(0.01)
+        # Chat lain (token masih penuh) juga harus menunggu jeda RetryAfter selesai
+        await self.send(6, "other")
+        self.assertEqual(await first, "ok")
+        self.assertEqual(len(calls), 2)
+        self.assertGreaterEqual(self.sent[0][1] - started, 1.0)
+        self.assertGreaterEqual(calls[1] - started, 1.0)
+
+    async def test_retry_after_gives_up_after_max_retries(self):
+        calls = []
+
+        async def always_limited():
+            calls.append(time.monotonic())
+            raise RetryAfter(0)
+
+        with mock.patch.object(bot, "OUTBOUND_MAX_RETRIES", 2):
+            with self.assertRaises(RetryAfter):
+                await self.send(5, "x", callback=always_limited)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(self.queue.stats()["retries"], 2)
+        self.assertEqual(self.queue.stats()["failed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
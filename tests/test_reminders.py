@@ -0,0 +1,59 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ADMIN_ID", "1")
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:test")
+
+import bot  # noqa: E402
+
+T = 1_000_000.0
+INTERVAL = 600
+
+
+class RestoreRemindersTest(unittest.TestCase):
+    def setUp(self):
+        bot._reminders.clear()
+        bot._reminder_heap.clear()
+
+    def tearDown(self):
+        bot._reminders.clear()
+        bot._reminder_heap.clear()
+
+    def fire(self, now):
+        """Satu tick scheduler: return data yang disimpan mark_reminders_fired."""
+        return bot.served_phases(bot.pop_due_reminders(now))
+
+    def restore(self, last_fired, now):
+        bot._reminders.clear()
+        bot._reminder_heap.clear()
+        saved = [{"chat_id": 5, "airdrop_id": 7, "interval": INTERVAL, "first_run": T, "last_fired": last_fired}]
+        bot.restore_reminders(saved, now=now)
+        return bot._reminders[(5, 7)]["next_run"]
+
+    def test_restore_after_early_fire_keeps_phase(self):
+        bot.schedule_reminder(5, 7, INTERVAL, T)
+        self.assertEqual(self.fire(T), [(5, 7, T)])
+        # Fase T+600 dikirim lebih awal (masuk jendela batch tick T+560)
+        served = self.fire(T + 560)
+        self.assertEqual(served, [(5, 7, T + INTERVAL)])
+        next_run = self.restore(served[0][2], now=T + 700)
+        # Tidak dikirim ulang: jadwal berikutnya tetap fase T+1200 (ditambah jitter kecil)
+        self.assertGreaterEqual(next_run, T + 2 * INTERVAL)
+        self.assertLessEqual(next_run, T + 2 * INTERVAL + INTERVAL / 10)
+
+    def test_restore_sends_missed_phase(self):
+        now = T + 3 * INTERVAL + 100  # fase T+1200 dan T+1800 terlewat selama bot mati
+        next_run = self.restore(T + INTERVAL, now=now)
+        self.assertGreaterEqual(next_run, now)
+        self.assertLessEqual(next_run, now + bot.REMINDER_RESTORE_JITTER)
+
+    def test_restore_never_fired(self):
+        next_run = self.restore(None, now=T - 100)
+        self.assertGreaterEqual(next_run, T)
+        self.assertLess(next_run, T + INTERVAL)
+
+
+if __name__ == "__main__":
+    unittest.main()